@@ -1 +1,31 @@
-from .client import Client, ClientConfig, ErrorResponse, SuccessResponse
+from .cache import CacheStats, ResponseCache
+from .client import (
+    Client,
+    ClientConfig,
+    ErrorResponse,
+    PartialResultError,
+    RequestConfig,
+    SuccessResponse,
+    create_session,
+)
+from .decoders import JsonDecoder, available_json_decoders, default_json_decoder
+from .encoding import (
+    CompressedBody,
+    TransferStats,
+    available_encodings,
+    compress,
+    decompress,
+)
+from .httpcache import DiskHttpCache, HttpCacheEntry
+from .metrics import Histogram, Metrics, PathStats, RequestTiming
+from .ratelimit import (
+    RateLimiter,
+    ResponseError,
+    RetryPolicy,
+    ThrottleStats,
+    TokenBucket,
+    parse_retry_after,
+)
+from .replay import ReplayLog, ReplayMissError, ReplayMode
+from .streaming import JsonObjectStreamParser, StreamParser
+from .sync import EventLoopThread, SyncClient
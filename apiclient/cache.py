@@ -0,0 +1,104 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, NamedTuple, TypeVar
+
+_TValue = TypeVar("_TValue")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+class _CacheItem(NamedTuple, Generic[_TValue]):
+    value: _TValue
+    expires_at: float
+    size: int
+
+
+class ResponseCache(Generic[_TValue]):
+    """LRU cache whose entries also expire after a per-entry TTL.
+
+    The cache is bounded both by number of entries and by the sum of the
+    entry sizes (the size of the response body the entry was decoded from).
+    Cached values are shared between callers and must not be mutated.
+
+    With `keep_stale` expired entries are not dropped on access but stay until
+    evicted, so `get_stale` can reuse them once the server confirms they are
+    still current, e.g. with a 304.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        keep_stale: bool = False,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.keep_stale = keep_stale
+        self.stats = CacheStats()
+        self._clock = clock
+        self._items: OrderedDict[Hashable, _CacheItem[_TValue]] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable) -> _TValue | None:
+        item = self._items.get(key)
+        if item is None:
+            self.stats.misses += 1
+            return None
+
+        if item.expires_at <= self._clock():
+            if not self.keep_stale:
+                self._remove(key)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.stats.hits += 1
+        return item.value
+
+    def get_stale(self, key: Hashable) -> _TValue | None:
+        """The value of `key` even if it expired, without counting a hit."""
+        item = self._items.get(key)
+        if item is None:
+            return None
+        self._items.move_to_end(key)
+        return item.value
+
+    def put(self, key: Hashable, value: _TValue, ttl: float, size: int = 0) -> None:
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        if key in self._items:
+            self._remove(key)
+        self._items[key] = _CacheItem(value, self._clock() + ttl, size)
+        self._bytes += size
+
+        while len(self._items) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self._items)))
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        self._bytes -= self._items.pop(key).size
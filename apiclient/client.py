@@ -1,11 +1,32 @@
+import asyncio
+import time
 from abc import ABC
-from dataclasses import dataclass
-from typing import Generic, Literal, Type, TypeVar
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Generic, Hashable, Literal, NamedTuple, Type, TypeVar
+from urllib.parse import urlsplit
 
 import aiohttp
 import vcr
 from vcr.record_mode import RecordMode
 
+from .cache import ResponseCache
+from .decoders import JsonDecoder, default_json_decoder
+from .encoding import (
+    CompressedBody,
+    TransferStats,
+    available_encodings,
+    compress,
+    content_codings,
+    decompress,
+)
+from .httpcache import DiskHttpCache
+from .metrics import Metrics, RequestTiming
+from .ratelimit import RateLimiter, ResponseError, RetryPolicy, ThrottleStats
+from .replay import ReplayLog
+from .streaming import StreamParser
+
 
 @dataclass
 class ClientConfig:
@@ -17,6 +38,66 @@ class ClientConfig:
     use_vcr: bool = False
     vcr_outpath: str = "out/apiclient.vcr"
     raise_errors: bool = False
+    # connection pool options, see aiohttp.TCPConnector
+    connection_limit: int = 100
+    connection_limit_per_host: int = 0  # 0 means no limit
+    keepalive_timeout: float = 15
+    dns_cache_ttl: int | None = 10  # None caches forever
+    # directory of the conditional request (ETag/Last-Modified) cache, None disables it
+    http_cache_dir: str | None = None
+    # in-memory response cache, 0 entries disables it
+    cache_max_entries: int = 0
+    cache_max_bytes: int | None = None  # None only bounds the number of entries
+    cache_default_ttl: float = 60
+    # seconds a response stays cached by request path, overrides cache_default_ttl
+    cache_ttls: dict[str, float] = field(default_factory=dict)
+    # merge identical concurrent requests into one upstream fetch
+    coalesce_requests: bool = True
+    # decodes raw response bodies, defaults to orjson/msgspec when installed
+    json_decoder: JsonDecoder | None = None
+    # bodies of at least decode_offload_bytes are decoded in this executor so the
+    # event loop is not blocked. a ProcessPoolExecutor needs a picklable decoder.
+    # streamed bodies are parsed in it as they download, unless it is a process pool
+    decode_executor: Executor | None = None
+    decode_offload_bytes: int = 1 << 20
+    # paces requests per host and backs off on 429s, can be shared between clients
+    rate_limiter: RateLimiter | None = None
+    # None disables retries
+    retry: RetryPolicy | None = None
+    # per path latency histograms and counters, None disables timing entirely
+    metrics: Metrics | None = None
+    # records responses to and replays them from an indexed file, a faster
+    # alternative to use_vcr. can be shared between clients
+    replay: ReplayLog | None = None
+    # content encodings offered to the server, None offers every one that can be
+    # decoded (gzip, deflate, and br/zstd when their modules are installed)
+    accept_encodings: list[str] | None = None
+    # keep cached bodies compressed with this encoding, in memory and on disk.
+    # memory cache hits are then decompressed and decoded on every access,
+    # trading CPU for memory
+    cache_compression: str | None = None
+
+    def cache_ttl(self, cfg: "RequestConfig") -> float:
+        return self.cache_ttls.get(cfg.path, self.cache_default_ttl)
+
+
+def create_session(cfg: ClientConfig) -> aiohttp.ClientSession:
+    """Create a session whose pool is configured by `cfg`.
+
+    The session can be passed to several clients so they share one pool, the
+    caller is then responsible for closing it.
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=cfg.connection_limit,
+            limit_per_host=cfg.connection_limit_per_host,
+            keepalive_timeout=cfg.keepalive_timeout,
+            ttl_dns_cache=cfg.dns_cache_ttl,
+            use_dns_cache=True,
+        ),
+        timeout=aiohttp.ClientTimeout(total=cfg.timeout_seconds),
+        trace_configs=[cfg.metrics.trace_config()] if cfg.metrics else None,
+    )
 
 
 _TData = TypeVar("_TData")
@@ -29,6 +110,20 @@ class RequestConfig(Generic[_TData]):
     path: str
     params: dict[str, str]
     response_type: Type[_TData]
+    # builds the response while the body downloads instead of decoding it at the end
+    stream_parser: Callable[[], StreamParser[_TData]] | None = None
+
+    @property
+    def key(self) -> Hashable:
+        """Identifies requests that fetch the same resource."""
+        return (
+            self.method,
+            self.url,
+            self.path,
+            tuple(sorted(self.params.items())),
+            self.response_type,
+            self.stream_parser,
+        )
 
 
 @dataclass
@@ -41,55 +136,222 @@ class ErrorResponse:
     msg: str
 
 
+class PartialResultError(Exception):
+    """Raised with raise_errors=True by calls that fan out many requests.
+
+    It is raised once every request has settled. `result` is what the call
+    returns without raise_errors, with the failures among its errors, and
+    `exceptions` holds what each failed request raised.
+    """
+
+    def __init__(self, result: Any, exceptions: dict[Hashable, Exception]) -> None:
+        super().__init__(
+            f"{len(exceptions)} requests failed: "
+            + ", ".join(f"{key}: {e}" for key, e in exceptions.items())
+        )
+        self.result = result
+        self.exceptions = exceptions
+
+
+class _Fetched(NamedTuple):
+    data: Any
+    # decoded body size
+    size: int
+    # the compressed body to cache instead of the data, see cache_compression
+    stored: CompressedBody | None = None
+
+
 _TModel = TypeVar("_TModel")
+_TKey = TypeVar("_TKey", bound=Hashable)
 _TConfig = TypeVar("_TConfig", bound=ClientConfig)
 
+STREAM_CHUNK_BYTES = 1 << 16
+# chunks read while the parser is busy in the decode executor, at most
+STREAM_BUFFER_CHUNKS = 8
+
+
+def _decode(decoder: JsonDecoder, response_type: Type[_TModel], body: bytes) -> _TModel:
+    # module level so it can be sent to a process pool
+    return response_type(decoder(body))
+
+
+def _feed(parser: StreamParser[_TModel], chunks: list[bytes]) -> None:
+    for chunk in chunks:
+        parser.feed(chunk)
+
+
+def _feed_and_close(parser: StreamParser[_TModel], chunks: list[bytes]) -> _TModel:
+    _feed(parser, chunks)
+    return parser.close()
+
 
 class Client(ABC, Generic[_TConfig]):
-    __session: aiohttp.ClientSession | None = None
+    __session: aiohttp.ClientSession | None
+    # only sessions created by the client are closed by it
+    __owns_session: bool
+    __in_flight: dict[Hashable, asyncio.Task]
     _config: _TConfig
 
-    def __init__(self, cfg: _TConfig) -> None:
+    def __init__(
+        self, cfg: _TConfig, session: aiohttp.ClientSession | None = None
+    ) -> None:
         self._config = cfg
+        self.__session = session
+        self.__owns_session = session is None
+        self.__in_flight = {}
+        self._json_decoder = cfg.json_decoder or default_json_decoder()
+        self.throttle_stats = ThrottleStats()
+        self.transfer_stats = TransferStats()
+        encodings = cfg.accept_encodings
+        if encodings is None:
+            encodings = available_encodings()
+        unsupported = set(encodings).union(
+            [cfg.cache_compression] if cfg.cache_compression else []
+        ) - set(available_encodings())
+        if unsupported:
+            raise ValueError(f"Unsupported content encodings: {unsupported}")
+        self._accept_encoding = ", ".join(encodings) or "identity"
+        self._http_cache = (
+            DiskHttpCache(cfg.http_cache_dir) if cfg.http_cache_dir else None
+        )
+        self._cache: ResponseCache[SuccessResponse | CompressedBody] | None = (
+            # expired entries are kept to answer a 304 without decoding again
+            ResponseCache(
+                cfg.cache_max_entries,
+                cfg.cache_max_bytes,
+                keep_stale=self._http_cache is not None,
+            )
+            if cfg.cache_max_entries > 0
+            else None
+        )
         print(f"Init with config: {self._config}")
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        await self.aclose()
+
     @property
     def config(self):
         return self._config
 
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if not self.__session or (self.__owns_session and self.__session.closed):
+            self.__session = create_session(self._config)
+            self.__owns_session = True
+        return self.__session
+
+    @property
+    def cache(self) -> ResponseCache[SuccessResponse | CompressedBody] | None:
+        return self._cache
+
+    async def aclose(self) -> None:
+        """Close the session if it was created by this client."""
+        if self.__owns_session and self.__session:
+            await self.__session.close()
+        self.__session = None
+
     def build_get_config(
         self,
         path: str,
         model: Type[_TModel],
         params: dict[str, str],
+        stream_parser: Callable[[], StreamParser[_TModel]] | None = None,
     ) -> RequestConfig[_TModel]:
-        return RequestConfig("GET", self._config.base_url, path, params, model)
+        return RequestConfig(
+            "GET", self._config.base_url, path, params, model, stream_parser
+        )
 
     async def request(
-        self, cfg: RequestConfig[_TModel]
+        self, cfg: RequestConfig[_TModel], use_cache: bool = True
     ) -> SuccessResponse[_TModel] | ErrorResponse:
-        async def do_request():
-            if not self.__session:
-                self.__session = aiohttp.ClientSession(
-                    timeout=aiohttp.ClientTimeout(total=self._config.timeout_seconds),
+        # with use_cache=False the memory cache is not read, but is still updated
+        if use_cache and self._cache is not None and (hit := self._cache.get(cfg.key)):
+            if self._config.metrics:
+                self._config.metrics.record(
+                    RequestTiming(cfg.method, cfg.path, cache="memory")
+                )
+            if isinstance(hit, CompressedBody):
+                return SuccessResponse(
+                    (await self._from_body(cfg, hit.decompress())).data
                 )
+            return hit
+
+        if not self._config.coalesce_requests:
+            return await self._fetch(cfg)
+
+        # identical concurrent requests share one fetch. the fetch is shielded so
+        # a cancelled caller does not cancel it for everyone else
+        key = cfg.key
+        task = self.__in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(cfg))
+            self.__in_flight[key] = task
+            task.add_done_callback(partial(self.__fetch_done, key))
+        return await asyncio.shield(task)
+
+    async def request_many(
+        self,
+        cfgs: dict[_TKey, RequestConfig[Any]],
+        concurrency: int,
+        use_cache: bool = True,
+    ) -> tuple[
+        dict[_TKey, SuccessResponse[Any] | ErrorResponse], dict[_TKey, Exception]
+    ]:
+        """Send requests with at most `concurrency` in flight, results by key.
+
+        Every request settles even if others fail. Requests that raise (with
+        raise_errors=True) get an ErrorResponse among the results and their
+        exception in the second dict, so the caller can raise
+        PartialResultError with whatever it built from the rest.
+        """
+        sem = asyncio.Semaphore(concurrency)
+        results: dict[_TKey, SuccessResponse[Any] | ErrorResponse] = {}
+        exceptions: dict[_TKey, Exception] = {}
+
+        async def send(key: _TKey, cfg: RequestConfig[Any]):
+            async with sem:
+                try:
+                    results[key] = await self.request(cfg, use_cache)
+                except Exception as e:
+                    results[key] = ErrorResponse(str(e) or type(e).__name__)
+                    exceptions[key] = e
+
+        async with asyncio.TaskGroup() as tg:
+            for key, cfg in cfgs.items():
+                tg.create_task(send(key, cfg))
+        # in the order of cfgs, not of completion
+        return {key: results[key] for key in cfgs}, exceptions
 
+    def __fetch_done(self, key: Hashable, task: asyncio.Task) -> None:
+        del self.__in_flight[key]
+        # mark the error as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(
+        self, cfg: RequestConfig[_TModel]
+    ) -> SuccessResponse[_TModel] | ErrorResponse:
+        async def do_request():
             try:
-                async with self.__session.request(
-                    method=cfg.method, url=cfg.url + cfg.path, params=cfg.params
-                ) as res:
-                    if self._config.verbose:
-                        print("Response Details")
-                        print("---------------")
-                        print(f"Code = {res.status}")
-                        print(f"Reason = {res.reason}")
-                        print(f"Text = {await res.text()}")
-                        print(f"Request = {res.request_info}")
-
-                    if not str(res.status).startswith("2"):
-                        raise Exception(f"Request error: {res}", res.request_info)
-
-                    return SuccessResponse(cfg.response_type(await res.json()))
+                replay = self._config.replay
+                replayed = await replay.get(cfg) if replay is not None else None
+                if replayed is not None:
+                    fetched = await self._from_body(cfg, replayed)
+                else:
+                    fetched = await self._send(cfg)
+                response = SuccessResponse(fetched.data)
+                if self._cache is not None:
+                    ttl = self._config.cache_ttl(cfg)
+                    if fetched.stored is not None:
+                        self._cache.put(
+                            cfg.key, fetched.stored, ttl, len(fetched.stored.body)
+                        )
+                    else:
+                        self._cache.put(cfg.key, response, ttl, fetched.size)
+                return response
             except Exception as e:
                 if self._config.raise_errors:
                     raise e
@@ -104,3 +366,276 @@ class Client(ABC, Generic[_TConfig]):
             ):
                 return await do_request()
         return await do_request()
+
+    async def _send(self, cfg: RequestConfig[_TModel]) -> _Fetched:
+        """Send the request, pacing and retrying it as configured."""
+        policy = self._config.retry
+        limiter = self._config.rate_limiter
+        bucket = limiter.bucket(urlsplit(cfg.url).netloc) if limiter else None
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            if bucket:
+                self.throttle_stats.limiter_wait += await bucket.acquire()
+            self.throttle_stats.attempts += 1
+            attempt += 1
+            try:
+                result = await self._attempt(cfg)
+                if bucket:
+                    bucket.succeeded()
+                return result
+            except Exception as e:
+                retry_after = None
+                if isinstance(e, ResponseError) and e.status == 429:
+                    self.throttle_stats.throttled += 1
+                    retry_after = e.retry_after
+                    if bucket:
+                        bucket.throttled(retry_after)
+
+                if not policy or not policy.should_retry(cfg.method, e, attempt):
+                    raise
+                delay = max(policy.backoff(attempt), retry_after or 0)
+                elapsed = time.monotonic() - start
+                if policy.deadline is not None and elapsed + delay > policy.deadline:
+                    raise
+
+                if self._config.verbose:
+                    print(f"Retrying in {delay:.2f}s after: {e}")
+                self.throttle_stats.retries += 1
+                self.throttle_stats.backoff_wait += delay
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, cfg: RequestConfig[_TModel]) -> _Fetched:
+        """A single request, returns the response data and the body size."""
+        metrics = self._config.metrics
+        if metrics is None:
+            return await self._exchange(cfg, None)
+
+        timing = RequestTiming(cfg.method, cfg.path)
+        try:
+            fetched = await self._exchange(cfg, timing)
+            timing.bytes = fetched.size
+        except Exception as e:
+            timing.error = str(e) or type(e).__name__
+            raise
+        finally:
+            metrics.record(timing)
+        return fetched
+
+    async def _parse(
+        self, cfg: RequestConfig[_TModel], body: bytes, timing: RequestTiming | None
+    ) -> _TModel:
+        args = (self._json_decoder, cfg.response_type, body)
+        executor = self._config.decode_executor
+        start = time.perf_counter()
+        if executor and len(body) >= self._config.decode_offload_bytes:
+            data = await asyncio.get_running_loop().run_in_executor(
+                executor, _decode, *args
+            )
+            if timing:
+                timing.add("decode", time.perf_counter() - start)
+            return data
+        if timing is None:
+            return _decode(*args)
+
+        decoded = self._json_decoder(body)
+        timing.add("decode", time.perf_counter() - start)
+        start = time.perf_counter()
+        data = cfg.response_type(decoded)
+        timing.add("model", time.perf_counter() - start)
+        return data
+
+    async def _from_body(self, cfg: RequestConfig[_TModel], body: bytes) -> _Fetched:
+        """Data of a replayed or cached body, built the way a live response would be."""
+        if cfg.stream_parser:
+            parser = cfg.stream_parser()
+            executor = self._stream_executor
+            if executor and len(body) >= self._config.decode_offload_bytes:
+                data = await asyncio.get_running_loop().run_in_executor(
+                    executor, _feed_and_close, parser, [body]
+                )
+            else:
+                data = _feed_and_close(parser, [body])
+            return _Fetched(data, len(body))
+        return _Fetched(await self._parse(cfg, body, None), len(body))
+
+    @property
+    def _stream_executor(self) -> Executor | None:
+        # a stream parser keeps its state between chunks, so it cannot be sent
+        # to another process
+        executor = self._config.decode_executor
+        return None if isinstance(executor, ProcessPoolExecutor) else executor
+
+    async def _parse_stream(
+        self,
+        parser: StreamParser[_TModel],
+        content: aiohttp.StreamReader,
+        chunks: list[bytes] | None,
+    ) -> tuple[_TModel, int]:
+        """Feed a body to `parser` as it downloads, returns the data and size.
+
+        With a decode executor the parser runs there, one batch of chunks at a
+        time, while the next chunks are read on the loop. Streamed bodies are
+        never whole in memory, so they are not held to decode_offload_bytes.
+        """
+        executor = self._stream_executor
+        loop = asyncio.get_running_loop()
+        feeding: asyncio.Future | None = None
+        batch: list[bytes] = []
+        size = 0
+        async for chunk in content.iter_chunked(STREAM_CHUNK_BYTES):
+            size += len(chunk)
+            if chunks is not None:
+                chunks.append(chunk)
+            if executor is None:
+                parser.feed(chunk)
+                continue
+
+            batch.append(chunk)
+            if (
+                feeding is not None
+                and not feeding.done()
+                and len(batch) < STREAM_BUFFER_CHUNKS
+            ):
+                continue
+            if feeding is not None:
+                await feeding
+            feeding = loop.run_in_executor(executor, _feed, parser, batch)
+            batch = []
+
+        if executor is None:
+            return parser.close(), size
+        if feeding is not None:
+            await feeding
+        return (
+            await loop.run_in_executor(executor, _feed_and_close, parser, batch),
+            size,
+        )
+
+    async def _compress(self, body: bytes) -> bytes:
+        encoding = self._config.cache_compression
+        if len(body) >= self._config.decode_offload_bytes:
+            return await asyncio.to_thread(compress, body, encoding)
+        return compress(body, encoding)
+
+    async def _exchange(
+        self, cfg: RequestConfig[_TModel], timing: RequestTiming | None
+    ) -> _Fetched:
+        replay = self._config.replay
+
+        async def parse(body: bytes) -> _TModel:
+            return await self._parse(cfg, body, timing)
+
+        # streamed bodies are never kept so they cannot be revalidated
+        cached = (
+            not cfg.stream_parser and self._http_cache and self._http_cache.get(cfg.key)
+        )
+        headers = {"Accept-Encoding": self._accept_encoding}
+        if cached:
+            headers.update(cached.validators)
+        async with self.session.request(
+            method=cfg.method,
+            url=cfg.url + cfg.path,
+            params=cfg.params,
+            headers=headers,
+            trace_request_ctx=timing,
+            # whole bodies are decompressed here, so their wire size is known and
+            # a compressed body can be cached as it arrived
+            auto_decompress=cfg.stream_parser is not None,
+        ) as res:
+            streamed = cfg.stream_parser is not None and str(res.status).startswith("2")
+            start = time.perf_counter()
+            # the body is read once and decoded straight from the bytes
+            raw = b"" if streamed else await res.read()
+            # aiohttp has already decoded any body of a streamed request,
+            # including error bodies that are read whole
+            encoding = (
+                None
+                if cfg.stream_parser is not None
+                else res.headers.get("Content-Encoding")
+            )
+            body = decompress(raw, encoding)
+            if not streamed:
+                self.transfer_stats.responses += 1
+                self.transfer_stats.wire_bytes += len(raw)
+                self.transfer_stats.decoded_bytes += len(body)
+            if timing:
+                timing.status = res.status
+                timing.wire_bytes = len(raw)
+                timing.add("body", time.perf_counter() - start)
+            if self._config.verbose:
+                print("Response Details")
+                print("---------------")
+                print(f"Code = {res.status}")
+                print(f"Reason = {res.reason}")
+                if not streamed:
+                    print(f"Text = {body.decode(res.get_encoding(), 'replace')}")
+                print(f"Request = {res.request_info}")
+
+            if cached and res.status == 304:
+                if timing:
+                    timing.cache = "http"
+                size = self._http_cache.body_size(cfg.key)
+                stale = (
+                    self._cache.get_stale(cfg.key) if self._cache is not None else None
+                )
+                body = None
+                if isinstance(stale, SuccessResponse):
+                    fetched = _Fetched(stale.data, size)
+                elif isinstance(stale, CompressedBody):
+                    body = stale.decompress()
+                    fetched = _Fetched(await parse(body), size, stale)
+                else:
+                    body = await self._http_cache.body(cfg.key, cached.encoding)
+                    fetched = _Fetched(await parse(body), size)
+                if replay is not None:
+                    if body is None:
+                        body = await self._http_cache.body(cfg.key, cached.encoding)
+                    await replay.record(cfg, body)
+                return fetched
+
+            if streamed:
+                # the body is only kept when it has to be recorded
+                chunks: list[bytes] | None = [] if replay is not None else None
+                data, size = await self._parse_stream(
+                    cfg.stream_parser(), res.content, chunks
+                )
+                # aiohttp decompresses streamed bodies, Content-Length is the
+                # wire size when the server sends one
+                wire_bytes = int(res.headers.get("Content-Length", size))
+                self.transfer_stats.responses += 1
+                self.transfer_stats.wire_bytes += wire_bytes
+                self.transfer_stats.decoded_bytes += size
+                if timing:
+                    timing.wire_bytes = wire_bytes
+                    timing.add("body", time.perf_counter() - start)
+                if chunks is not None:
+                    await replay.record(cfg, b"".join(chunks))
+                return _Fetched(data, size)
+
+            if not str(res.status).startswith("2"):
+                raise ResponseError(f"Request error: {res}", res)
+
+            data = await parse(body)
+            stored = None
+            compression = self._config.cache_compression
+            if compression and (self._cache is not None or self._http_cache):
+                # a body that arrived in the cache encoding is kept as it arrived
+                stored = CompressedBody(
+                    (
+                        raw
+                        if content_codings(encoding) == [compression]
+                        else await self._compress(body)
+                    ),
+                    compression,
+                )
+            if self._http_cache:
+                await self._http_cache.store(
+                    cfg.key,
+                    res.headers,
+                    stored.body if stored else body,
+                    stored.encoding if stored else None,
+                )
+            if replay is not None:
+                await replay.record(cfg, body)
+            return _Fetched(data, len(body), stored)
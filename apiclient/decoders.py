@@ -0,0 +1,30 @@
+import json
+from typing import Any, Callable
+
+JsonDecoder = Callable[[bytes], Any]
+
+
+def available_json_decoders() -> dict[str, JsonDecoder]:
+    """Installed JSON decoders that accept raw bytes by name, fastest first."""
+    found: dict[str, JsonDecoder] = {}
+    try:
+        import orjson
+
+        found["orjson"] = orjson.loads
+    except ImportError:
+        pass
+
+    try:
+        import msgspec
+
+        found["msgspec"] = msgspec.json.decode
+    except ImportError:
+        pass
+
+    found["json"] = json.loads
+    return found
+
+
+def default_json_decoder() -> JsonDecoder:
+    """Return the fastest installed JSON decoder that accepts raw bytes."""
+    return next(iter(available_json_decoders().values()))
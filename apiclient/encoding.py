@@ -0,0 +1,98 @@
+import zlib
+from dataclasses import dataclass
+from typing import Callable, NamedTuple
+
+# codecs by Content-Encoding, brotli and zstd only when a module is installed
+_COMPRESS: dict[str, Callable[[bytes], bytes]] = {
+    # level 6 is zlib's default, a good ratio for JSON at a modest cost
+    "gzip": lambda body: zlib.compress(body, 6, wbits=31),
+    "deflate": lambda body: zlib.compress(body, 6),
+}
+_DECOMPRESS: dict[str, Callable[[bytes], bytes]] = {
+    # wbits=47 accepts both gzip and zlib headers
+    "gzip": lambda body: zlib.decompress(body, wbits=47),
+    "deflate": lambda body: _inflate(body),
+}
+# names from before RFC 9110 that some servers still send
+_ALIASES = {"x-gzip": "gzip", "x-compress": "compress", "x-deflate": "deflate"}
+
+try:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        import brotli
+
+    _COMPRESS["br"] = lambda body: brotli.compress(body, quality=5)
+    _DECOMPRESS["br"] = brotli.decompress
+except ImportError:
+    pass
+
+try:
+    try:
+        from compression import zstd
+    except ImportError:
+        from backports import zstd
+
+    _COMPRESS["zstd"] = zstd.compress
+    _DECOMPRESS["zstd"] = zstd.decompress
+except ImportError:
+    pass
+
+
+def _inflate(body: bytes) -> bytes:
+    try:
+        return zlib.decompress(body)
+    except zlib.error:
+        # some servers send raw deflate streams without the zlib header
+        return zlib.decompress(body, wbits=-15)
+
+
+def available_encodings() -> list[str]:
+    """Content encodings that can be decoded."""
+    return list(_DECOMPRESS)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    return _COMPRESS[encoding](body)
+
+
+def content_codings(encoding: str | None) -> list[str]:
+    """The codings of a Content-Encoding header in the order they were applied."""
+    if not encoding:
+        return []
+    codings = (c.strip().lower() for c in encoding.split(","))
+    return [_ALIASES.get(c, c) for c in codings if c and c != "identity"]
+
+
+def decompress(body: bytes, encoding: str | None) -> bytes:
+    """Decode a body by its Content-Encoding, identity when None."""
+    # the last coding listed was applied last, so it is removed first
+    for coding in reversed(content_codings(encoding)):
+        try:
+            body = _DECOMPRESS[coding](body)
+        except KeyError:
+            raise ValueError(f"Unsupported content encoding: {encoding}") from None
+    return body
+
+
+class CompressedBody(NamedTuple):
+    """A response body kept compressed until it is used."""
+
+    body: bytes
+    encoding: str
+
+    def decompress(self) -> bytes:
+        return decompress(self.body, self.encoding)
+
+
+@dataclass
+class TransferStats:
+    responses: int = 0
+    # body bytes as received, before any Content-Encoding is decoded
+    wire_bytes: int = 0
+    decoded_bytes: int = 0
+
+    @property
+    def ratio(self) -> float:
+        """Decoded bytes per wire byte, 1 when nothing was compressed."""
+        return self.decoded_bytes / self.wire_bytes if self.wire_bytes else 1.0
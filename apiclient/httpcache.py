@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Hashable, Mapping
+
+from .encoding import decompress
+
+
+@dataclass
+class HttpCacheEntry:
+    etag: str | None = None
+    last_modified: str | None = None
+    # Content-Encoding of the stored body, None when it is stored decoded
+    encoding: str | None = None
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """Headers that turn a request for this entry into a conditional one."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class DiskHttpCache:
+    """Stores response bodies on disk alongside their ETag/Last-Modified validators.
+
+    Each entry is a `<hash>.body` file holding the raw body and a `<hash>.json`
+    file holding the validators. The client answers a 304 with the expired
+    entry of its bounded ResponseCache when it still has one, and only
+    decodes the stored body otherwise.
+    """
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: Hashable, suffix: str) -> Path:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return self._dir / f"{digest}{suffix}"
+
+    def get(self, key: Hashable) -> HttpCacheEntry | None:
+        if not self._path(key, ".body").exists():
+            return None
+        try:
+            with self._path(key, ".json").open() as f:
+                return HttpCacheEntry(**json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError, TypeError):
+            return None
+
+    async def load(
+        self,
+        key: Hashable,
+        parse: Callable[[bytes], Awaitable[Any]],
+        encoding: str | None = None,
+    ) -> Any:
+        """Decode the stored body of `key`."""
+        return await parse(await self.body(key, encoding))
+
+    async def body(self, key: Hashable, encoding: str | None = None) -> bytes:
+        """The stored body of `key`, decompressed."""
+        body = await asyncio.to_thread(self._path(key, ".body").read_bytes)
+        return decompress(body, encoding)
+
+    def body_size(self, key: Hashable) -> int:
+        try:
+            return self._path(key, ".body").stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    async def store(
+        self,
+        key: Hashable,
+        headers: Mapping[str, str],
+        body: bytes,
+        encoding: str | None = None,
+    ) -> None:
+        """Store a body as given, `encoding` is the encoding it is compressed with."""
+        entry = HttpCacheEntry(
+            headers.get("ETag"), headers.get("Last-Modified"), encoding
+        )
+        if not entry.etag and not entry.last_modified:
+            # the server cannot revalidate this response so there is no point
+            return
+
+        await asyncio.to_thread(self._write, key, entry, body)
+
+    def _write(self, key: Hashable, entry: HttpCacheEntry, body: bytes) -> None:
+        # write the body first so a crash never leaves validators without a body
+        for suffix, data in (
+            (".body", body),
+            (".json", json.dumps(asdict(entry)).encode()),
+        ):
+            path = self._path(key, suffix)
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
@@ -0,0 +1,260 @@
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Callable, Literal
+
+import aiohttp
+
+Phase = Literal["queue", "dns", "connect", "ttfb", "body", "decode", "model", "total"]
+PHASES: tuple[Phase, ...] = (
+    "queue",
+    "dns",
+    "connect",
+    "ttfb",
+    "body",
+    "decode",
+    "model",
+    "total",
+)
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+@dataclass
+class RequestTiming:
+    """Where the time of one request went, in seconds.
+
+    `queue` is the wait for a free pooled connection, `connect` includes TLS,
+    `ttfb` runs from the request headers being sent to the response headers
+    arriving, `decode` is the JSON decoder and `model` the response type built
+    from its output. Phases that did not happen, such as dns and connect on a
+    reused connection, are left out. Bodies decoded in an executor are counted as
+    `decode`, and streamed bodies are parsed during `body`.
+    """
+
+    method: str
+    path: str
+    started: float = field(default_factory=time.perf_counter)
+    phases: dict[Phase, float] = field(default_factory=dict)
+    status: int | None = None
+    # decoded body size and the size it had on the wire
+    bytes: int = 0
+    wire_bytes: int = 0
+    # "memory" or "http" when the response came from a cache
+    cache: Literal["memory", "http"] | None = None
+    error: str | None = None
+    # monotonic marks of the phases in progress, set by the trace callbacks
+    _marks: dict[str, float] = field(default_factory=dict, repr=False)
+
+    def add(self, phase: Phase, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def mark(self, name: str) -> None:
+        self._marks[name] = time.perf_counter()
+
+    def since(self, name: str) -> float:
+        return time.perf_counter() - self._marks.pop(name, self.started)
+
+
+class Histogram:
+    """Request counts by upper bound of latency, plus their sum."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        # the last count is for observations above every bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return float("inf")
+
+
+@dataclass
+class PathStats:
+    requests: int = 0
+    errors: int = 0
+    bytes: int = 0
+    wire_bytes: int = 0
+    memory_cache_hits: int = 0
+    http_cache_hits: int = 0
+    status_counts: dict[int, int] = field(default_factory=dict)
+    phases: dict[Phase, Histogram] = field(default_factory=dict)
+
+
+async def _on_queued_start(session, ctx: SimpleNamespace, params) -> None:
+    ctx.trace_request_ctx.mark("queue")
+
+
+async def _on_queued_end(session, ctx: SimpleNamespace, params) -> None:
+    timing = ctx.trace_request_ctx
+    timing.add("queue", timing.since("queue"))
+
+
+async def _on_dns_start(session, ctx: SimpleNamespace, params) -> None:
+    ctx.trace_request_ctx.mark("dns")
+
+
+async def _on_dns_end(session, ctx: SimpleNamespace, params) -> None:
+    timing = ctx.trace_request_ctx
+    timing.add("dns", timing.since("dns"))
+
+
+async def _on_connect_start(session, ctx: SimpleNamespace, params) -> None:
+    ctx.trace_request_ctx.mark("connect")
+
+
+async def _on_connect_end(session, ctx: SimpleNamespace, params) -> None:
+    timing = ctx.trace_request_ctx
+    # host resolution happens while the connection is created
+    timing.add("connect", timing.since("connect") - timing.phases.get("dns", 0.0))
+
+
+async def _on_headers_sent(session, ctx: SimpleNamespace, params) -> None:
+    ctx.trace_request_ctx.mark("ttfb")
+
+
+async def _on_request_end(session, ctx: SimpleNamespace, params) -> None:
+    timing = ctx.trace_request_ctx
+    timing.add("ttfb", timing.since("ttfb"))
+
+
+class Metrics:
+    """Per path latency histograms and counters of a client's requests.
+
+    Pass it as `ClientConfig.metrics`. Phase timings come from an aiohttp
+    trace config, which is only installed on sessions made by
+    `create_session`. Every finished request is also passed to `on_request`.
+    """
+
+    def __init__(
+        self,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        on_request: Callable[[RequestTiming], None] | None = None,
+    ) -> None:
+        self.buckets = buckets
+        self.on_request = on_request
+        self.paths: dict[str, PathStats] = {}
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        # only requests that pass a RequestTiming as trace_request_ctx are timed
+        trace = aiohttp.TraceConfig(trace_config_ctx_factory=self._trace_ctx)
+        trace.on_connection_queued_start.append(_on_queued_start)
+        trace.on_connection_queued_end.append(_on_queued_end)
+        trace.on_dns_resolvehost_start.append(_on_dns_start)
+        trace.on_dns_resolvehost_end.append(_on_dns_end)
+        trace.on_connection_create_start.append(_on_connect_start)
+        trace.on_connection_create_end.append(_on_connect_end)
+        trace.on_request_headers_sent.append(_on_headers_sent)
+        trace.on_request_end.append(_on_request_end)
+        return trace
+
+    @staticmethod
+    def _trace_ctx(trace_request_ctx=None) -> SimpleNamespace:
+        if not isinstance(trace_request_ctx, RequestTiming):
+            # a throwaway timing for requests made outside of Client
+            trace_request_ctx = RequestTiming("", "")
+        return SimpleNamespace(trace_request_ctx=trace_request_ctx)
+
+    def record(self, timing: RequestTiming) -> None:
+        timing.phases["total"] = time.perf_counter() - timing.started
+        stats = self.paths.get(timing.path)
+        if stats is None:
+            stats = self.paths[timing.path] = PathStats()
+        stats.requests += 1
+        stats.bytes += timing.bytes
+        stats.wire_bytes += timing.wire_bytes
+        if timing.error is not None:
+            stats.errors += 1
+        if timing.cache == "memory":
+            stats.memory_cache_hits += 1
+        elif timing.cache == "http":
+            stats.http_cache_hits += 1
+        if timing.status is not None:
+            stats.status_counts[timing.status] = (
+                stats.status_counts.get(timing.status, 0) + 1
+            )
+        for phase, seconds in timing.phases.items():
+            histogram = stats.phases.get(phase)
+            if histogram is None:
+                histogram = stats.phases[phase] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        if self.on_request:
+            self.on_request(timing)
+
+    def to_prometheus(self, prefix: str = "apiclient") -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = [f"# TYPE {prefix}_request_phase_seconds histogram"]
+        for path, stats in self.paths.items():
+            for phase in PHASES:
+                histogram = stats.phases.get(phase)
+                if histogram is None:
+                    continue
+                labels = f'path="{path}",phase="{phase}"'
+                seen = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    seen += count
+                    lines.append(
+                        f'{prefix}_request_phase_seconds_bucket{{{labels},le="{bound}"}} {seen}'
+                    )
+                lines.append(
+                    f'{prefix}_request_phase_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}'
+                )
+                lines.append(
+                    f"{prefix}_request_phase_seconds_sum{{{labels}}} {histogram.sum}"
+                )
+                lines.append(
+                    f"{prefix}_request_phase_seconds_count{{{labels}}} {histogram.count}"
+                )
+
+        counters = {
+            "requests_total": lambda s: [("", s.requests)],
+            "errors_total": lambda s: [("", s.errors)],
+            "response_bytes_total": lambda s: [("", s.bytes)],
+            "wire_bytes_total": lambda s: [("", s.wire_bytes)],
+            "cache_hits_total": lambda s: [
+                (',cache="memory"', s.memory_cache_hits),
+                (',cache="http"', s.http_cache_hits),
+            ],
+            "responses_total": lambda s: [
+                (f',status="{status}"', count)
+                for status, count in sorted(s.status_counts.items())
+            ],
+        }
+        for name, values in counters.items():
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for path, stats in self.paths.items():
+                for labels, value in values(stats):
+                    lines.append(f'{prefix}_{name}{{path="{path}"{labels}}} {value}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,146 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable
+
+import aiohttp
+
+
+class ResponseError(Exception):
+    """Raised for a non-2xx response."""
+
+    def __init__(self, msg: str, res: aiohttp.ClientResponse) -> None:
+        super().__init__(msg, res.request_info)
+        self.status = res.status
+        self.retry_after = parse_retry_after(res.headers.get("Retry-After"))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header, which is seconds or a date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    # the delay before attempt n is uniformly drawn from
+    # [0, min(max_delay, base_delay * 2 ** n)] ("full jitter")
+    base_delay: float = 0.5
+    max_delay: float = 30
+    # total seconds spent on a request across all attempts, None for no limit
+    deadline: float | None = 120
+    retry_statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+    # only idempotent requests are retried
+    retry_methods: frozenset[str] = frozenset({"GET"})
+
+    def should_retry(self, method: str, error: Exception, attempt: int) -> bool:
+        if attempt >= self.max_attempts or method not in self.retry_methods:
+            return False
+        if isinstance(error, ResponseError):
+            return error.status in self.retry_statuses
+        return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+@dataclass
+class ThrottleStats:
+    attempts: int = 0
+    retries: int = 0
+    # responses with status 429
+    throttled: int = 0
+    # seconds spent waiting for the rate limiter and between retries
+    limiter_wait: float = 0
+    backoff_wait: float = 0
+
+
+class TokenBucket:
+    """Token bucket whose rate adapts to the server (AIMD).
+
+    Every 429 halves the rate and blocks the bucket for the Retry-After
+    duration, every success raises the rate back by a small step up to the
+    configured maximum.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        min_rate: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._blocked_until = 0.0
+        # waiters are served in arrival order
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Wait for a token, returns the seconds waited."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._refill(now)
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                else:
+                    delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def throttled(self, retry_after: float | None = None) -> None:
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = min(self._tokens, 0)
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, self._clock() + retry_after)
+
+    def succeeded(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class RateLimiter:
+    """One adaptive token bucket per host.
+
+    A limiter can be set on the configs of several clients so they share the
+    budget of the hosts they talk to.
+    """
+
+    def __init__(
+        self, rate: float, burst: int = 1, min_rate: float | None = None
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def bucket(self, host: str) -> TokenBucket:
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst, self.min_rate)
+        return self._buckets[host]
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+import struct
+import zlib
+from typing import TYPE_CHECKING, Literal
+
+if TYPE_CHECKING:
+    from .client import RequestConfig
+
+ReplayMode = Literal["auto", "record", "replay"]
+
+# key length, compressed body length and crc32 of the compressed body
+_HEADER = struct.Struct("<III")
+# records at least this large are read and decompressed off the event loop
+_OFFLOAD_BYTES = 1 << 16
+
+
+class ReplayMissError(Exception):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def replay_key(cfg: "RequestConfig") -> bytes:
+    # the base url is left out so a recording can be replayed against any host
+    return json.dumps(
+        [cfg.method, cfg.path, sorted(cfg.params.items())], separators=(",", ":")
+    ).encode()
+
+
+class ReplayLog:
+    """Recorded response bodies in one indexed, append-only file.
+
+    Each record is a header, the request key and the zlib compressed body.
+    The file is scanned once when opened, reading only the headers and keys,
+    to build an in-memory index of body offsets, so a replay is one dict
+    lookup and one positioned read. Records cut short by a crash are dropped
+    and overwritten by the next append, and bodies that fail their crc32 check
+    are treated as not recorded. A key recorded twice replays its
+    latest body.
+
+    In "auto" mode recorded requests are replayed and the others are sent and
+    recorded, "record" always sends and records, and "replay" never sends and
+    raises `ReplayMissError` for requests that were not recorded. Only 2xx
+    responses are recorded. Share one log between the clients writing to the
+    same file.
+    """
+
+    def __init__(self, path: str | os.PathLike, mode: ReplayMode = "auto") -> None:
+        self.path = os.fspath(path)
+        self.mode = mode
+        self._index: dict[bytes, tuple[int, int, int]] = {}
+        self._lock = asyncio.Lock()
+        if mode == "replay":
+            self._fd = os.open(self.path, os.O_RDONLY)
+        else:
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._end = self._scan()
+        if mode != "replay" and os.fstat(self._fd).st_size > self._end:
+            os.ftruncate(self._fd, self._end)
+
+    def _scan(self) -> int:
+        """Index every complete record, returns the offset after the last one."""
+        size = os.fstat(self._fd).st_size
+        offset = 0
+        while offset + _HEADER.size <= size:
+            key_len, body_len, crc = _HEADER.unpack(
+                os.pread(self._fd, _HEADER.size, offset)
+            )
+            body_at = offset + _HEADER.size + key_len
+            end = body_at + body_len
+            if end > size:
+                break
+            key = os.pread(self._fd, key_len, offset + _HEADER.size)
+            self._index[key] = (body_at, body_len, crc)
+            offset = end
+        return offset
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, cfg: "RequestConfig") -> bool:
+        return replay_key(cfg) in self._index
+
+    async def get(self, cfg: "RequestConfig") -> bytes | None:
+        """The recorded body of a request, None when it should be sent."""
+        if self.mode == "record":
+            return None
+        body = None
+        entry = self._index.get(replay_key(cfg))
+        if entry is not None:
+            if entry[1] >= _OFFLOAD_BYTES:
+                body = await asyncio.to_thread(self._read, *entry)
+            else:
+                body = self._read(*entry)
+        if body is None:
+            if self.mode == "replay":
+                raise ReplayMissError(f"No recorded response for {cfg.path}")
+            return None
+        return body
+
+    def _read(self, offset: int, length: int, crc: int) -> bytes | None:
+        # a positioned read does not move a shared file offset, so concurrent
+        # replays need no lock
+        compressed = os.pread(self._fd, length, offset)
+        if zlib.crc32(compressed) != crc:
+            # a record damaged on disk is treated as never recorded
+            return None
+        return zlib.decompress(compressed)
+
+    async def record(self, cfg: "RequestConfig", body: bytes) -> None:
+        if self.mode == "replay":
+            return
+        key = replay_key(cfg)
+        compressed = await asyncio.to_thread(zlib.compress, body)
+        crc = zlib.crc32(compressed)
+        record = _HEADER.pack(len(key), len(compressed), crc) + key + compressed
+        async with self._lock:
+            offset = self._end
+            await asyncio.to_thread(os.pwrite, self._fd, record, offset)
+            self._end = offset + len(record)
+            self._index[key] = (self._end - len(compressed), len(compressed), crc)
+
+    def close(self) -> None:
+        os.close(self._fd)
@@ -0,0 +1,181 @@
+import codecs
+import json
+import re
+from abc import ABC, abstractmethod
+from array import array
+from typing import Any, Generator, Generic, MutableSequence, TypeVar
+
+_TResult = TypeVar("_TResult")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_PARSERS = {"i": int, "l": int, "q": int, "f": float, "d": float}
+
+# parser steps yield whenever they need more input
+_Step = Generator[None, None, _TResult]
+
+
+class StreamParser(ABC, Generic[_TResult]):
+    """Builds a response from the body as it is downloaded, chunk by chunk."""
+
+    @abstractmethod
+    def feed(self, chunk: bytes) -> None:
+        """Called with every chunk of the body as it arrives."""
+
+    @abstractmethod
+    def close(self) -> _TResult:
+        """Called after the last chunk, returns the parsed response."""
+
+
+class JsonObjectStreamParser(StreamParser[dict[str, Any]]):
+    """Incrementally parses a JSON object without holding the whole body.
+
+    Values of the top level object are handled one element at a time: arrays
+    are decoded item by item into `new_array(key)` and objects entry by entry,
+    so at most one item is ever buffered. Numeric arrays listed in
+    `typed_arrays` (key -> `array` typecode) skip per item decoding and are
+    filled directly. Subclasses can also override `convert` to compact items
+    as they arrive.
+    """
+
+    typed_arrays: dict[str, str] = {}
+
+    def __init__(self) -> None:
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._result: dict[str, Any] = {}
+        self._steps = self._parse()
+        self._done = False
+        self._advance()
+
+    def new_array(self, key: str) -> MutableSequence[Any]:
+        return []
+
+    def convert(self, key: str, value: Any) -> Any:
+        """Applied to every array item and object entry of top level `key`."""
+        return value
+
+    def feed(self, chunk: bytes) -> None:
+        if self._done:
+            return
+        self._buf = self._buf[self._pos :] + self._decoder.decode(chunk)
+        self._pos = 0
+        self._advance()
+
+    def close(self) -> dict[str, Any]:
+        if not self._done:
+            self._buf = self._buf[self._pos :] + self._decoder.decode(b"", final=True)
+            self._pos = 0
+            self._eof = True
+            self._advance()
+        if not self._done:
+            raise ValueError("Truncated JSON body")
+        return self._result
+
+    def _advance(self) -> None:
+        try:
+            next(self._steps)
+        except StopIteration:
+            self._done = True
+
+    def _error(self, msg: str) -> ValueError:
+        return ValueError(f"{msg} at {self._buf[self._pos : self._pos + 20]!r}")
+
+    def _peek(self) -> _Step[str]:
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if self._eof:
+                raise self._error("Unexpected end of JSON body")
+            yield
+
+    def _expect(self, *chars: str) -> _Step[str]:
+        c = yield from self._peek()
+        if c not in chars:
+            raise self._error(f"Expected {' or '.join(chars)}")
+        self._pos += 1
+        return c
+
+    def _value(self) -> _Step[Any]:
+        yield from self._peek()
+        tried = 0
+        while True:
+            pending = len(self._buf) - self._pos
+            # only retry once the pending text doubled so a long value is not
+            # rescanned for every chunk
+            if pending >= 2 * tried or self._eof:
+                try:
+                    value, end = self._json.raw_decode(self._buf, self._pos)
+                    # a number at the very end of the buffer may continue in the next chunk
+                    if end < len(self._buf) or self._eof:
+                        self._pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if self._eof:
+                        raise
+                tried = pending
+            yield
+
+    def _numbers(self, key: str) -> _Step[array]:
+        column = array(self.typed_arrays[key])
+        parse = _NUMBER_PARSERS[column.typecode]
+        while True:
+            end = self._buf.find("]", self._pos)
+            stop = end if end != -1 else self._buf.rfind(",", self._pos)
+            if stop > self._pos:
+                segment = self._buf[self._pos : stop]
+                if segment.strip():
+                    column.extend(map(parse, segment.split(",")))
+                # keep the separator so the next segment starts after it
+                self._pos = stop + 1 if end == -1 else stop
+            if end != -1:
+                self._pos = end + 1
+                return column
+            if self._eof:
+                raise self._error("Unexpected end of JSON body")
+            yield
+
+    def _parse(self) -> _Step[None]:
+        yield from self._expect("{")
+        if (yield from self._peek()) == "}":
+            self._pos += 1
+            return
+
+        while True:
+            key = yield from self._value()
+            yield from self._expect(":")
+            c = yield from self._peek()
+            if c == "[" and key in self.typed_arrays:
+                self._pos += 1
+                self._result[key] = yield from self._numbers(key)
+            elif c == "[":
+                self._pos += 1
+                items = self._result[key] = self.new_array(key)
+                if (yield from self._peek()) == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        items.append(self.convert(key, (yield from self._value())))
+                        if (yield from self._expect(",", "]")) == "]":
+                            break
+            elif c == "{":
+                self._pos += 1
+                entries = self._result[key] = {}
+                if (yield from self._peek()) == "}":
+                    self._pos += 1
+                else:
+                    while True:
+                        entry = yield from self._value()
+                        yield from self._expect(":")
+                        value = yield from self._value()
+                        entries[entry] = self.convert(key, value)
+                        if (yield from self._expect(",", "}")) == "}":
+                            break
+            else:
+                self._result[key] = yield from self._value()
+
+            if (yield from self._expect(",", "}")) == "}":
+                return
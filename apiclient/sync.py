@@ -0,0 +1,164 @@
+import asyncio
+import functools
+import inspect
+import threading
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Generic,
+    Iterable,
+    Iterator,
+    TypeVar,
+)
+
+from .client import Client
+
+_T = TypeVar("_T")
+_TItem = TypeVar("_TItem")
+_TClient = TypeVar("_TClient", bound=Client)
+
+
+class EventLoopThread:
+    """An event loop running forever on a daemon thread.
+
+    Coroutines are submitted from any thread with `run`, which blocks the
+    caller until the coroutine finishes on the loop thread.
+    """
+
+    _default: "EventLoopThread | None" = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, name: str = "apiclient-loop") -> None:
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name=name, daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def default(cls) -> "EventLoopThread":
+        """The loop shared by every SyncClient not given one, started on first use."""
+        with cls._default_lock:
+            if cls._default is None or cls._default.loop.is_closed():
+                cls._default = cls()
+            return cls._default
+
+    def run(self, coro: Coroutine[Any, Any, _T], timeout: float | None = None) -> _T:
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("EventLoopThread.run called from its own loop")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+async def _invoke(fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    result = fn(*args, **kwargs)
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+class SyncClient(Generic[_TClient]):
+    """Blocking proxy of a Client for code that cannot await.
+
+    The client is created by `factory` on a background event loop and lives
+    there, so its pooled session is reused by every call. Any coroutine
+    method of the client can be called directly and blocks until it is done,
+    async iterators are returned as plain iterators. Calls are safe from any
+    number of threads, they all run on the one loop. `gather` and `map` fan
+    out many calls concurrently underneath one blocking call.
+
+        with SyncClient(lambda: EconomyApi(cfg)) as api:
+            currency = api.get_currency()
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], _TClient],
+        loop: EventLoopThread | None = None,
+        timeout: float | None = None,
+    ) -> None:
+        self._loop = loop or EventLoopThread.default()
+        self.timeout = timeout
+        # created on the loop so anything it binds to a loop binds to that one
+        self.client: _TClient = self._loop.run(_invoke(factory, (), {}))
+
+    def _run(self, coro: Coroutine[Any, Any, _T]) -> _T:
+        return self._loop.run(coro, self.timeout)
+
+    def __getattr__(self, name: str) -> Any:
+        # properties may need the running loop, e.g. the lazily created session
+        attr = self._run(_invoke(getattr, (self.client, name), {}))
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            result = self._run(_invoke(attr, args, kwargs))
+            if isinstance(result, AsyncIterator):
+                return self._iterate(result)
+            return result
+
+        return call
+
+    def _iterate(self, iterator: AsyncIterator[_T]) -> Iterator[_T]:
+        try:
+            while True:
+                try:
+                    yield self._run(_invoke(anext, (iterator,), {}))
+                except StopAsyncIteration:
+                    return
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose:
+                self._run(_invoke(aclose, (), {}))
+
+    def gather(self, *calls: Callable[[_TClient], Awaitable[_T]]) -> list[_T]:
+        """Run every call with the client concurrently, results in order."""
+
+        async def gather():
+            return await asyncio.gather(*(call(self.client) for call in calls))
+
+        return self._run(gather())
+
+    def map(
+        self,
+        fn: Callable[[_TClient, _TItem], Awaitable[_T]],
+        items: Iterable[_TItem],
+        concurrency: int | None = None,
+    ) -> list[_T]:
+        """`fn(client, item)` for every item, at most `concurrency` at once."""
+
+        async def run_all():
+            sem = asyncio.Semaphore(concurrency) if concurrency else None
+
+            async def run_one(item: _TItem) -> _T:
+                if sem is None:
+                    return await fn(self.client, item)
+                async with sem:
+                    return await fn(self.client, item)
+
+            return await asyncio.gather(*map(run_one, items))
+
+        return self._run(run_all())
+
+    def close(self) -> None:
+        self._run(self.client.aclose())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
@@ -0,0 +1,55 @@
+"""Compare JSON decoders on the recorded fixtures.
+
+Usage: python -m benchmarks.decode [fixture ...]
+
+For every fixture and installed decoder prints the best decode time over a few
+rounds and the peak memory allocated while decoding, as measured by
+tracemalloc. The decoder the clients pick by default is marked with a *.
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+from apiclient import available_json_decoders, default_json_decoder
+
+DEFAULT_FIXTURES = ["tests/week13_exp_ladder.json", "tests/week13_havoc.json"]
+ROUNDS = 5
+
+
+def measure(decode: Callable[[bytes], Any], body: bytes) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        decode(body)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    decode(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main(fixtures: list[str]) -> None:
+    print(f"{'fixture':<32} {'decoder':<8} {'ms':>9} {'peak MiB':>9}")
+    for fixture in fixtures:
+        path = Path(fixture)
+        if not path.exists():
+            print(f"{path.name:<32} missing, skipped")
+            continue
+
+        body = path.read_bytes()
+        default = default_json_decoder()
+        for name, decode in available_json_decoders().items():
+            seconds, peak = measure(decode, body)
+            name += "*" if decode is default else ""
+            print(
+                f"{path.name:<32} {name:<8} {seconds * 1e3:>9.2f} {peak / 2**20:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or DEFAULT_FIXTURES)
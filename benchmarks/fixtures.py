@@ -0,0 +1,154 @@
+"""Generated responses shaped like the real poe.ninja ones.
+
+Shared by the benchmark server and the tests.
+"""
+
+import random
+
+
+def currency_response(lines: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+
+    def transaction(id: int, pay: int, get: int) -> dict:
+        return {
+            "id": id,
+            "league_id": 1,
+            "pay_currency_id": pay,
+            "get_currency_id": get,
+            "sample_time_utc": "2023-05-01T00:00:00Z",
+            "count": rng.randrange(1, 500),
+            "value": rng.uniform(0.001, 200),
+            "data_point_count": 1,
+            "includes_secondary": False,
+            "listing_count": rng.randrange(1, 2000),
+        }
+
+    def sparkline() -> dict:
+        return {
+            "data": [rng.uniform(-10, 10) for _ in range(7)],
+            "totalChange": rng.uniform(-10, 10),
+        }
+
+    return {
+        "lines": [
+            {
+                "currencyTypeName": f"Currency {i}",
+                "pay": transaction(2 * i, i + 1, 0),
+                "receive": transaction(2 * i + 1, 0, i + 1),
+                "paySparkLine": sparkline(),
+                "receiveSparkLine": sparkline(),
+                "chaosEquivalent": rng.uniform(0.01, 50000),
+                "lowConfidencePaySparkLine": sparkline(),
+                "lowConfidenceReceiveSparkLine": sparkline(),
+                "detailsId": f"currency-{i}",
+            }
+            for i in range(lines)
+        ],
+        "currencyDetails": [
+            {"id": i, "icon": "", "name": f"Currency {i}", "tradeId": f"c{i}"}
+            for i in range(lines + 1)
+        ],
+        "language": {"name": "en", "translations": {}},
+    }
+
+
+def item_response(lines: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    return {
+        "lines": [
+            {
+                "id": i,
+                "name": f"Item {i}",
+                "icon": "",
+                "baseType": f"Base {i % 50}",
+                "itemClass": 3,
+                "sparkline": {
+                    "data": [rng.uniform(-10, 10) for _ in range(7)],
+                    "totalChange": rng.uniform(-10, 10),
+                },
+                "lowConfidenceSparkline": {"data": [], "totalChange": 0},
+                "implicitModifiers": [
+                    {"text": "+10 to maximum Life", "optional": False}
+                ],
+                "explicitModifiers": [
+                    {"text": f"{j}% increased Damage", "optional": False}
+                    for j in range(5)
+                ],
+                "flavourText": "A long time ago, in a league far away.",
+                "chaosValue": rng.uniform(1, 10000),
+                "exaltedValue": rng.uniform(0.01, 100),
+                "divineValue": rng.uniform(0.01, 50),
+                "count": rng.randrange(1, 100),
+                "detailsId": f"item-{i}",
+                "tradeInfo": [],
+                "listingCount": rng.randrange(1, 500),
+            }
+            for i in range(lines)
+        ],
+        "language": {"name": "en", "translations": {}},
+    }
+
+
+def delta_encode(user_ids: list[int]) -> list[int]:
+    return [b - a for a, b in zip([0] + user_ids, user_ids)]
+
+
+def fake_builds_response(users: int = 200, seed: int = 0) -> dict:
+    """A small BuildsResponse shaped like the real thing."""
+    rng = random.Random(seed)
+
+    def use_map(labels: int) -> dict[str, list[int]]:
+        return {
+            str(i): delta_encode(sorted(rng.sample(range(users), rng.randrange(users))))
+            for i in range(labels)
+            if rng.random() < 0.9
+        }
+
+    return {
+        "classNames": ["Juggernaut", "Necromancer", "Deadeye"],
+        "classes": [rng.randrange(3) for _ in range(users)],
+        "uniqueItems": [{"name": f"Unique {i}", "type": "Ring"} for i in range(5)],
+        "uniqueItemUse": use_map(5),
+        "activeSkills": [
+            {"name": f"Skill {i}", "icon": "", "dpsName": ""} for i in range(4)
+        ],
+        "activeSkillUse": use_map(4),
+        "allSkills": [{"name": f"Gem {i}", "icon": ""} for i in range(6)],
+        "allSkillUse": use_map(6),
+        "keystones": [
+            {"name": f"Keystone {i}", "icon": "", "isKeystone": True, "type": ""}
+            for i in range(3)
+        ],
+        "keystoneUse": use_map(3),
+        "masteries": [{"name": f"Mastery {i}"} for i in range(4)],
+        "masteryUse": use_map(4),
+        "skillModes": [{"name": "Normal"}],
+        "skillModeUse": use_map(1),
+        "skillDetails": [
+            {
+                "name": f"Skill {i}",
+                "supportGems": {
+                    "names": [{"name": f"Support {j}"} for j in range(3)],
+                    "use": use_map(3),
+                    "dictionary": {f"Support {j}": j for j in range(3)},
+                },
+                "dps": {str(u): [1000, 0, 0, 100, 0, 0, 0] for u in range(3)},
+            }
+            for i in range(4)
+        ],
+        "levels": [rng.randrange(90, 101) for _ in range(users)],
+        "life": [rng.randrange(1, 8000) for _ in range(users)],
+        "energyShield": [rng.randrange(0, 8000) for _ in range(users)],
+        "names": [f"char{i}" for i in range(users)],
+        "accounts": [f"account{i}" for i in range(users)],
+        "ladderRanks": list(range(1, users + 1)),
+        "delveSolo": [rng.randrange(0, 500) for _ in range(users)],
+        "fetchModes": [{"name": "Standard"}],
+        "fetchModeUse": [0] * users,
+        "weaponConfigurationTypes": [{"name": "Two Handed"}],
+        "weaponConfigurationTypeUse": [0] * users,
+        "updatedUtc": "2023-05-01T00:00:00Z",
+        "language": {"name": "en", "translations": {}},
+        "leagues": [],
+        "leagueNames": [],
+    }
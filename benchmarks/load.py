@@ -0,0 +1,241 @@
+"""Load test EconomyApi and BuildsApi against the local stand-in server.
+
+Usage: python -m benchmarks.load [--concurrency 1,8,32] [--requests 200]
+       [--latency 0.02] [--scale 1] [--decode-threads 0] [--url URL]
+       [--output out/bench_load.json]
+
+Every scenario runs `requests` requests with at most `concurrency` in flight
+and reports requests per second, latency percentiles, event loop lag, the
+decode time measured by `apiclient.Metrics` and, in a second pass under
+tracemalloc, the peak memory of one batch of `concurrency` requests. The
+results are written as JSON so runs can be compared. Without `--url` the
+server runs in this process and competes with the client for the CPU. With
+`--decode-threads` bodies and streamed ladders are decoded in a thread pool
+of that size instead of on the event loop.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from aiohttp.test_utils import TestServer
+
+from apiclient import Metrics, SuccessResponse, default_json_decoder
+from ninjaclient import BuildsApi, EconomyApi, NinjaConfig
+
+from .server import make_app
+
+Call = Callable[[EconomyApi, BuildsApi, int], Awaitable[object]]
+
+SCENARIOS: dict[str, Call] = {
+    "currency": lambda economy, builds, i: economy.get_currency(),
+    "items": lambda economy, builds, i: economy.get_unique_armours(),
+    "ladder": lambda economy, builds, i: builds.get_experience_ladder(),
+    "ladder_stream": lambda economy, builds, i: builds.get_experience_ladder(
+        stream=True
+    ),
+    "character": lambda economy, builds, i: builds.get_character(
+        f"account{i}", f"char{i}"
+    ),
+}
+
+
+class LoopLag:
+    """Samples how late the event loop wakes up a sleeping task."""
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(time.perf_counter() - start - self.interval)
+
+    def __enter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *_):
+        self._task.cancel()
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    if len(values) < 2:
+        value = values[0] if values else 0.0
+        return {"p50": value, "p90": value, "p99": value, "max": value}
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": q[49], "p90": q[89], "p99": q[98], "max": max(values)}
+
+
+async def run_batch(
+    call: Call,
+    economy: EconomyApi,
+    builds: BuildsApi,
+    requests: int,
+    concurrency: int,
+) -> tuple[list[float], int]:
+    """Latencies of `requests` calls made by `concurrency` workers, and errors."""
+    latencies: list[float] = []
+    errors = 0
+    pending = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in pending:
+            start = time.perf_counter()
+            res = await call(economy, builds, i)
+            latencies.append(time.perf_counter() - start)
+            errors += not isinstance(res, SuccessResponse)
+
+    async with asyncio.TaskGroup() as tg:
+        for _ in range(concurrency):
+            tg.create_task(worker())
+    return latencies, errors
+
+
+async def run_scenario(
+    url: str,
+    name: str,
+    concurrency: int,
+    requests: int,
+    executor: Executor | None = None,
+) -> dict[str, object]:
+    metrics = Metrics()
+    cfg = NinjaConfig(
+        base_url=url,
+        # every request goes upstream, identical requests are not merged
+        coalesce_requests=False,
+        connection_limit=max(100, concurrency),
+        metrics=metrics,
+        decode_executor=executor,
+        # the stand-in ladders are well under the default offload size
+        decode_offload_bytes=0,
+    )
+    call = SCENARIOS[name]
+    # clients print their config on init
+    with contextlib.redirect_stdout(io.StringIO()):
+        economy, builds = EconomyApi(cfg), BuildsApi(cfg)
+    async with economy, builds:
+        # warm up the connection pool
+        await run_batch(call, economy, builds, concurrency, concurrency)
+        metrics.paths.clear()
+
+        with LoopLag() as lag:
+            start = time.perf_counter()
+            latencies, errors = await run_batch(
+                call, economy, builds, requests, concurrency
+            )
+            elapsed = time.perf_counter() - start
+        # taken before the traced batch, tracemalloc slows every phase down
+        [stats] = metrics.paths.values()
+        metrics.paths.clear()
+
+        tracemalloc.start()
+        await run_batch(call, economy, builds, concurrency, concurrency)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    decode = [stats.phases[p] for p in ("decode", "model") if p in stats.phases]
+    body = stats.phases["body"]
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "rps": requests / elapsed,
+        "latency": percentiles(latencies),
+        "loop_lag": percentiles(lag.samples),
+        "body_mean": body.sum / body.count,
+        "decode_mean": sum(h.sum for h in decode) / body.count,
+        "bytes_per_request": stats.bytes / stats.requests,
+        "peak_memory": peak,
+    }
+
+
+async def main(args: argparse.Namespace) -> list[dict[str, object]]:
+    server = None
+    url = args.url
+    if not url:
+        server = TestServer(make_app(args.latency, args.scale))
+        await server.start_server()
+        url = str(server.make_url("")).rstrip("/")
+
+    executor = ThreadPoolExecutor(args.decode_threads) if args.decode_threads else None
+    results = []
+    try:
+        for name in args.scenarios:
+            for concurrency in args.concurrency:
+                result = await run_scenario(
+                    url, name, concurrency, args.requests, executor
+                )
+                results.append(result)
+                print(
+                    f"{name:<14} c={concurrency:<4} {result['rps']:>9.1f} rps"
+                    f"  p50 {result['latency']['p50'] * 1e3:>8.2f} ms"
+                    f"  p99 {result['latency']['p99'] * 1e3:>8.2f} ms"
+                    f"  lag p99 {result['loop_lag']['p99'] * 1e3:>7.2f} ms"
+                    f"  decode {result['decode_mean'] * 1e3:>7.2f} ms"
+                    f"  peak {result['peak_memory'] / 2**20:>7.2f} MiB",
+                    file=sys.stderr,
+                )
+    finally:
+        if server:
+            await server.close()
+        if executor:
+            executor.shutdown()
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--concurrency",
+        type=lambda s: [int(c) for c in s.split(",")],
+        default=[1, 8, 32],
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--scale", type=float, default=1)
+    parser.add_argument(
+        "--scenarios",
+        type=lambda s: s.split(","),
+        default=list(SCENARIOS),
+    )
+    parser.add_argument("--decode-threads", type=int, default=0)
+    parser.add_argument("--url", help="benchmark a server started separately")
+    parser.add_argument("--output", default="out/bench_load.json")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "python": platform.python_version(),
+                "decoder": getattr(default_json_decoder(), "__module__", None),
+                "latency": args.latency if not args.url else None,
+                "scale": args.scale,
+                "decode_threads": args.decode_threads,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"Results written to {output}", file=sys.stderr)
@@ -0,0 +1,69 @@
+"""Local stand-in for the poe.ninja endpoints the clients use.
+
+Usage: python -m benchmarks.server [--port 8080] [--latency 0.05] [--scale 1]
+
+Responses are served from the recorded fixtures when present and generated
+otherwise. Every body is encoded once at startup, so the server adds little
+besides the configured latency. `scale` multiplies the number of lines of
+the economy responses and the number of characters of the ladder.
+"""
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from aiohttp import web
+
+from .fixtures import currency_response, fake_builds_response, item_response
+
+LADDER_FIXTURE = Path("tests/week13_exp_ladder.json")
+CHARACTER_FIXTURE = Path("tests/week13_havoc.json")
+
+
+def payloads(scale: float = 1) -> dict[str, bytes]:
+    """Encoded response bodies by path."""
+    ladder = (
+        LADDER_FIXTURE.read_bytes()
+        if LADDER_FIXTURE.exists() and scale == 1
+        else json.dumps(fake_builds_response(users=int(5000 * scale))).encode()
+    )
+    character = (
+        CHARACTER_FIXTURE.read_bytes()
+        if CHARACTER_FIXTURE.exists()
+        else json.dumps({"account": "", "name": ""}).encode()
+    )
+    return {
+        "/currencyoverview": json.dumps(currency_response(int(150 * scale))).encode(),
+        "/itemoverview": json.dumps(item_response(int(500 * scale))).encode(),
+        "/0/getbuildoverview": ladder,
+        "/0/getcharacter": character,
+    }
+
+
+def make_app(latency: float = 0.0, scale: float = 1) -> web.Application:
+    """An app serving every path after `latency` seconds."""
+    app = web.Application()
+    for path, body in payloads(scale).items():
+
+        async def handler(request: web.Request, body: bytes = body):
+            if latency:
+                await asyncio.sleep(latency)
+            return web.Response(body=body, content_type="application/json")
+
+        app.router.add_get(path, handler)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--scale", type=float, default=1)
+    args = parser.parse_args()
+    web.run_app(make_app(args.latency, args.scale), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,11 @@
-from .client import BuildsApi, EconomyApi, NinjaConfig
+from .client import BuildsApi, EconomyApi, EconomySnapshot, NinjaConfig
+from .crawler import CrawlProgress, crawl_characters
+from .exchange import ExchangeGraph
+from .feed import EconomyChangeFeed, EconomyChanges, PriceChange
+from .history import LadderHistory
+from .ladder import Ladder, UsageIndex
+from .leagues import LeagueTable
+from .prices import PriceIndex, PriceRecord
+from .query import LadderIndex, Users
+from .refresh import RefreshState, SnapshotRefresher
+from .store import SnapshotStore
@@ -1,9 +1,26 @@
-from dataclasses import asdict, dataclass
-from typing import Literal
-
-from apiclient import Client, ClientConfig
-
+import math
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterable, Literal, get_args
+
+import aiohttp
+
+from apiclient import (
+    Client,
+    ClientConfig,
+    ErrorResponse,
+    PartialResultError,
+    RequestConfig,
+    SuccessResponse,
+)
+
+from .compact import CompactCurrencyResponse, CompactItemResponse
+from .crawler import Character, CrawlProgress, crawl_characters
+from .history import LadderHistory
+from .ladder import Dimension, Ladder
+from .leagues import LeagueTable
 from .models import *
+from .streaming import BuildsStreamParser
 
 
 @dataclass
@@ -13,6 +30,25 @@ class NinjaConfig(ClientConfig):
     language: str = "en"
     verbose: bool = False
     timeout_seconds: int = 300
+    # max number of categories fetched at once by EconomyApi.get_snapshot
+    snapshot_concurrency: int = 8
+    # economy lines are returned as compact, dict compatible records, see compact.py
+    compact_lines: bool = False
+    # poe.ninja refreshes economy data every few minutes and ladders less often
+    cache_ttls: dict[str, float] = field(
+        default_factory=lambda: {
+            "/currencyoverview": 60,
+            "/itemoverview": 60,
+            "/0/getbuildoverview": 600,
+            "/0/getcharacter": 600,
+        }
+    )
+
+    def cache_ttl(self, cfg: RequestConfig) -> float:
+        # time machine snapshots are historical and never change
+        if cfg.params.get("timemachine"):
+            return math.inf
+        return super().cache_ttl(cfg)
 
 
 ApiPath = Literal[
@@ -107,123 +143,334 @@ class CharacterRequestParams:
     timemachine: TimeMachineType = ""
 
 
+@dataclass
+class EconomySnapshot:
+    currencies: dict[CurrencyOverviewType, CurrencyResponse] = field(
+        default_factory=dict
+    )
+    items: dict[ItemOverviewType, ItemResponse] = field(default_factory=dict)
+    # categories that failed to fetch, the rest of the snapshot is still usable
+    errors: dict[EconomyRequestType, ErrorResponse] = field(default_factory=dict)
+
+
 class EconomyApi(Client[NinjaConfig]):
-    def __init__(self, cfg: NinjaConfig = NinjaConfig()) -> None:
-        super().__init__(cfg)
+    def __init__(
+        self,
+        cfg: NinjaConfig = NinjaConfig(),
+        session: aiohttp.ClientSession | None = None,
+    ) -> None:
+        super().__init__(cfg, session)
 
-    def _build_get_currency_config(self, type: CurrencyOverviewType):
+    def _build_get_currency_config(
+        self,
+        type: CurrencyOverviewType,
+        league: str | None = None,
+        language: str | None = None,
+    ):
         return self.build_get_config(
             "/currencyoverview",
-            CurrencyResponse,
+            CompactCurrencyResponse if self.config.compact_lines else CurrencyResponse,
             asdict(
                 EconomyRequestParams(
-                    type=type, league=self.config.league, language=self.config.language
+                    type=type,
+                    league=league or self.config.league,
+                    language=language or self.config.language,
                 )
             ),
         )
 
-    def _build_get_item_config(self, type: ItemOverviewType):
+    def _build_get_item_config(
+        self,
+        type: ItemOverviewType,
+        league: str | None = None,
+        language: str | None = None,
+    ):
         return self.build_get_config(
             "/itemoverview",
-            ItemResponse,
+            CompactItemResponse if self.config.compact_lines else ItemResponse,
             asdict(
                 EconomyRequestParams(
-                    type=type, league=self.config.league, language=self.config.language
+                    type=type,
+                    league=league or self.config.league,
+                    language=language or self.config.language,
                 )
             ),
         )
 
-    async def get_currency(self):
-        return await self.request(self._build_get_currency_config("Currency"))
+    def _build_get_category_config(
+        self,
+        type: EconomyRequestType,
+        league: str | None = None,
+        language: str | None = None,
+    ):
+        if type in get_args(CurrencyOverviewType):
+            return self._build_get_currency_config(type, league, language)
+        return self._build_get_item_config(type, league, language)
 
-    async def get_fragments(self):
-        return await self.request(self._build_get_currency_config("Fragment"))
+    async def get_snapshot(
+        self,
+        concurrency: int | None = None,
+        league: str | None = None,
+        language: str | None = None,
+    ) -> EconomySnapshot:
+        """Fetch every currency and item category concurrently.
+
+        At most `concurrency` requests (default `NinjaConfig.snapshot_concurrency`)
+        are in flight at once over the shared session. With raise_errors=True a
+        PartialResultError holding the partial snapshot is raised once every
+        category has settled.
+        """
+        cfgs = {
+            type: self._build_get_category_config(type, league, language)
+            for type in get_args(CurrencyOverviewType) + get_args(ItemOverviewType)
+        }
+        results, exceptions = await self.request_many(
+            cfgs, concurrency or self.config.snapshot_concurrency
+        )
+        snapshot = EconomySnapshot()
+        for type, res in results.items():
+            if isinstance(res, ErrorResponse):
+                snapshot.errors[type] = res
+            elif type in get_args(CurrencyOverviewType):
+                snapshot.currencies[type] = res.data
+            else:
+                snapshot.items[type] = res.data
+        if exceptions:
+            raise PartialResultError(snapshot, exceptions)
+        return snapshot
+
+    async def get_category(
+        self,
+        type: EconomyRequestType,
+        league: str | None = None,
+        language: str | None = None,
+    ):
+        return await self.request(
+            self._build_get_category_config(type, league, language)
+        )
 
-    async def get_divination_cards(self):
-        return await self.request(self._build_get_item_config("DivinationCard"))
+    async def get_across_leagues(
+        self,
+        type: EconomyRequestType,
+        leagues: list[str],
+        language: str | None = None,
+        concurrency: int | None = None,
+    ) -> LeagueTable:
+        """Fetch one category for several leagues, lines aligned by detailsId.
+
+        The leagues are fetched concurrently over the shared session, see
+        `get_snapshot` for `concurrency` and raise_errors.
+        """
+        results, exceptions = await self.request_many(
+            {
+                league: self._build_get_category_config(type, league, language)
+                for league in leagues
+            },
+            concurrency or self.config.snapshot_concurrency,
+        )
+        table = LeagueTable.from_responses(
+            leagues,
+            {l: r.data for l, r in results.items() if isinstance(r, SuccessResponse)},
+            {l: r for l, r in results.items() if isinstance(r, ErrorResponse)},
+        )
+        if exceptions:
+            raise PartialResultError(table, exceptions)
+        return table
 
-    async def get_artifacts(self):
-        return await self.request(self._build_get_item_config("Artifact"))
+    async def get_currency(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_currency_config("Currency", league, language)
+        )
 
-    async def get_oils(self):
-        return await self.request(self._build_get_item_config("Oil"))
+    async def get_fragments(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_currency_config("Fragment", league, language)
+        )
 
-    async def get_incubators(self):
-        return await self.request(self._build_get_item_config("Incubator"))
+    async def get_divination_cards(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("DivinationCard", league, language)
+        )
 
-    async def get_unique_weapons(self):
-        return await self.request(self._build_get_item_config("UniqueWeapon"))
+    async def get_artifacts(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("Artifact", league, language)
+        )
+
+    async def get_oils(self, league: str | None = None, language: str | None = None):
+        return await self.request(self._build_get_item_config("Oil", league, language))
 
-    async def get_unique_armours(self):
-        return await self.request(self._build_get_item_config("UniqueArmour"))
-    
-    async def get_unique_accessories(self):
-        return await self.request(self._build_get_item_config("UniqueAccessory"))
+    async def get_incubators(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("Incubator", league, language)
+        )
 
-    async def get_unique_flasks(self):
-        return await self.request(self._build_get_item_config("UniqueFlask"))
+    async def get_unique_weapons(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("UniqueWeapon", league, language)
+        )
 
-    async def get_unique_jewels(self):
-        return await self.request(self._build_get_item_config("UniqueJewel"))
+    async def get_unique_armours(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("UniqueArmour", league, language)
+        )
 
-    async def get_skill_gems(self):
-        return await self.request(self._build_get_item_config("SkillGem"))
+    async def get_unique_accessories(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("UniqueAccessory", league, language)
+        )
 
-    async def get_cluster_jewels(self):
-        return await self.request(self._build_get_item_config("ClusterJewel"))
+    async def get_unique_flasks(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("UniqueFlask", league, language)
+        )
+
+    async def get_unique_jewels(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("UniqueJewel", league, language)
+        )
+
+    async def get_skill_gems(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("SkillGem", league, language)
+        )
+
+    async def get_cluster_jewels(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("ClusterJewel", league, language)
+        )
 
-    async def get_maps(self):
-        return await self.request(self._build_get_item_config("Map"))
+    async def get_maps(self, league: str | None = None, language: str | None = None):
+        return await self.request(self._build_get_item_config("Map", league, language))
 
-    async def get_blighted_maps(self):
-        return await self.request(self._build_get_item_config("BlightedMap"))
+    async def get_blighted_maps(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("BlightedMap", league, language)
+        )
 
-    async def get_blight_ravaged_maps(self):
-        return await self.request(self._build_get_item_config("BlightRavagedMap"))
+    async def get_blight_ravaged_maps(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("BlightRavagedMap", league, language)
+        )
 
-    async def get_scourged_maps(self):
-        return await self.request(self._build_get_item_config("ScourgedMap"))
+    async def get_scourged_maps(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("ScourgedMap", league, language)
+        )
 
-    async def get_unique_maps(self):
-        return await self.request(self._build_get_item_config("UniqueMap"))
+    async def get_unique_maps(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("UniqueMap", league, language)
+        )
 
-    async def get_delirium_orbs(self):
-        return await self.request(self._build_get_item_config("DeliriumOrb"))
+    async def get_delirium_orbs(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("DeliriumOrb", league, language)
+        )
 
-    async def get_invitations(self):
-        return await self.request(self._build_get_item_config("Invitation"))
+    async def get_invitations(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("Invitation", league, language)
+        )
 
-    async def get_scarabs(self):
-        return await self.request(self._build_get_item_config("Scarab"))
+    async def get_scarabs(self, league: str | None = None, language: str | None = None):
+        return await self.request(
+            self._build_get_item_config("Scarab", league, language)
+        )
 
-    async def get_base_types(self):
-        return await self.request(self._build_get_item_config("BaseType"))
+    async def get_base_types(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("BaseType", league, language)
+        )
 
-    async def get_fossils(self):
-        return await self.request(self._build_get_item_config("Fossil"))
+    async def get_fossils(self, league: str | None = None, language: str | None = None):
+        return await self.request(
+            self._build_get_item_config("Fossil", league, language)
+        )
 
-    async def get_resonators(self):
-        return await self.request(self._build_get_item_config("Resonator"))
+    async def get_resonators(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("Resonator", league, language)
+        )
 
-    async def get_helmet_enchants(self):
-        return await self.request(self._build_get_item_config("HelmetEnchant"))
+    async def get_helmet_enchants(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("HelmetEnchant", league, language)
+        )
 
-    async def get_beasts(self):
-        return await self.request(self._build_get_item_config("Beast"))
+    async def get_beasts(self, league: str | None = None, language: str | None = None):
+        return await self.request(
+            self._build_get_item_config("Beast", league, language)
+        )
 
-    async def get_essences(self):
-        return await self.request(self._build_get_item_config("Essence"))
+    async def get_essences(
+        self, league: str | None = None, language: str | None = None
+    ):
+        return await self.request(
+            self._build_get_item_config("Essence", league, language)
+        )
 
-    async def get_vials(self):
-        return await self.request(self._build_get_item_config("Vial"))
+    async def get_vials(self, league: str | None = None, language: str | None = None):
+        return await self.request(self._build_get_item_config("Vial", league, language))
 
 
 class BuildsApi(Client[NinjaConfig]):
-    def __init__(self, cfg: NinjaConfig = NinjaConfig()) -> None:
-        super().__init__(cfg)
+    def __init__(
+        self,
+        cfg: NinjaConfig = NinjaConfig(),
+        session: aiohttp.ClientSession | None = None,
+    ) -> None:
+        super().__init__(cfg, session)
 
     def _build_get_builds_config(
-        self, type: BuildAndCharOverviewType, tm: TimeMachineType
+        self,
+        type: BuildAndCharOverviewType,
+        tm: TimeMachineType,
+        stream: bool = False,
+        league: str | None = None,
+        language: str | None = None,
     ):
         return self.build_get_config(
             "/0/getbuildoverview",
@@ -232,10 +479,11 @@ class BuildsApi(Client[NinjaConfig]):
                 BuildsRequestParams(
                     type=type,
                     timemachine=tm,
-                    overview=self.config.league.lower(),
-                    Language=self.config.language,
+                    overview=(league or self.config.league).lower(),
+                    Language=language or self.config.language,
                 )
             ),
+            stream_parser=BuildsStreamParser if stream else None,
         )
 
     def _build_get_character_config(
@@ -243,6 +491,8 @@ class BuildsApi(Client[NinjaConfig]):
         account: str,
         name: str,
         tm: TimeMachineType,
+        league: str | None = None,
+        language: str | None = None,
     ):
         return self.build_get_config(
             "/0/getcharacter",
@@ -253,19 +503,128 @@ class BuildsApi(Client[NinjaConfig]):
                     name=name,
                     type="exp",  # doesnt matter if this is 'exp' or 'depthsolo'
                     timemachine=tm,
-                    overview=self.config.league.lower(),
-                    Language=self.config.language,
+                    overview=(league or self.config.league).lower(),
+                    Language=language or self.config.language,
                 )
             ),
         )
 
-    async def get_experience_ladder(self, tm: TimeMachineType = ""):
-        return await self.request(self._build_get_builds_config("exp", tm=tm))
+    # with stream=True the ladder is parsed while it downloads into compact arrays,
+    # see BuildsStreamParser. the parser is pure Python: without a decode_executor
+    # it blocks the event loop for longer than a bulk decode, and with one it
+    # still holds the GIL, so bulk requests have the higher throughput and
+    # streaming only saves memory on large ladders. see `make bench_load`
+    async def get_experience_ladder(
+        self,
+        tm: TimeMachineType = "",
+        stream: bool = False,
+        league: str | None = None,
+        language: str | None = None,
+    ):
+        return await self.request(
+            self._build_get_builds_config("exp", tm, stream, league, language)
+        )
 
-    async def get_delve_ladder(self, tm: TimeMachineType = ""):
-        return await self.request(self._build_get_builds_config("depthsolo", tm=tm))
+    async def get_delve_ladder(
+        self,
+        tm: TimeMachineType = "",
+        stream: bool = False,
+        league: str | None = None,
+        language: str | None = None,
+    ):
+        return await self.request(
+            self._build_get_builds_config("depthsolo", tm, stream, league, language)
+        )
 
-    async def get_character(self, account: str, name: str, tm: TimeMachineType = ""):
+    async def get_across_leagues(
+        self,
+        leagues: list[str],
+        dimension: Dimension = "class",
+        type: BuildAndCharOverviewType = "exp",
+        tm: TimeMachineType = "",
+        stream: bool = False,
+        language: str | None = None,
+        concurrency: int | None = None,
+    ) -> LeagueTable[int]:
+        """Fetch one ladder for several leagues, usage of `dimension` by name.
+
+        Row `name` holds the number of characters using it in every league,
+        see `LeagueTable.from_ladders` and `EconomyApi.get_across_leagues`.
+        """
+        results, exceptions = await self.request_many(
+            {
+                league: self._build_get_builds_config(
+                    type, tm, stream, league, language
+                )
+                for league in leagues
+            },
+            concurrency or self.config.snapshot_concurrency,
+        )
+        table = LeagueTable.from_ladders(
+            leagues,
+            {
+                l: Ladder.from_response(r.data)
+                for l, r in results.items()
+                if isinstance(r, SuccessResponse)
+            },
+            dimension,
+            {l: r for l, r in results.items() if isinstance(r, ErrorResponse)},
+        )
+        if exceptions:
+            raise PartialResultError(table, exceptions)
+        return table
+
+    async def get_ladder_history(
+        self,
+        tms: list[TimeMachineType],
+        type: BuildAndCharOverviewType = "exp",
+        concurrency: int | None = None,
+        stream: bool = False,
+    ) -> tuple[LadderHistory, dict[TimeMachineType, ErrorResponse]]:
+        """Fetch several time machine snapshots concurrently and align them.
+
+        Snapshots that fail are left out of the history and returned as errors.
+        With raise_errors=True a PartialResultError holding the (history, errors)
+        pair is raised once every snapshot has settled.
+        """
+        results, exceptions = await self.request_many(
+            {
+                tm: self._build_get_builds_config(type, tm=tm, stream=stream)
+                for tm in tms
+            },
+            concurrency or self.config.snapshot_concurrency,
+        )
+        fetched = [tm for tm in tms if isinstance(results[tm], SuccessResponse)]
+        history = LadderHistory.align(
+            fetched, [Ladder.from_response(results[tm].data) for tm in fetched]
+        )
+        errors = {tm: res for tm, res in results.items() if tm not in fetched}
+        if exceptions:
+            raise PartialResultError((history, errors), exceptions)
+        return history, errors
+
+    async def get_character(
+        self,
+        account: str,
+        name: str,
+        tm: TimeMachineType = "",
+        league: str | None = None,
+        language: str | None = None,
+    ):
         return await self.request(
-            self._build_get_character_config(account=account, name=name, tm=tm)
+            self._build_get_character_config(account, name, tm, league, language)
+        )
+
+    def crawl_characters(
+        self,
+        source: Ladder | BuildsResponse | Iterable[Character],
+        concurrency: int = 4,
+        rate: float | None = None,
+        checkpoint: str | Path | None = None,
+        tm: TimeMachineType = "",
+        on_progress: Callable[[CrawlProgress], None] | None = None,
+    ) -> AsyncIterator[CharacterResponse]:
+        """Fetch every character of a ladder, see `crawler.crawl_characters`."""
+        return crawl_characters(
+            self, source, concurrency, rate, checkpoint, tm, on_progress
         )
@@ -0,0 +1,145 @@
+import json
+from collections.abc import Mapping
+from typing import Any, Iterator
+
+_MISSING = object()
+
+
+class CompactRecord(Mapping):
+    """Read-only, dict compatible record with a small memory footprint.
+
+    The frequently read keys listed in `_fields` are stored in slots. Every
+    other key is kept as one compact JSON blob that is decoded on access, so
+    rarely used fields such as modifiers and flavour text cost a few bytes
+    instead of nested dicts and lists.
+    """
+
+    __slots__ = ("_rest",)
+    _fields: tuple[str, ...] = ()
+    # compact types of nested records, by key
+    _nested: dict[str, type["CompactRecord"]] = {}
+
+    def __init__(self, data: Mapping[str, Any]) -> None:
+        rest = dict(data)
+        for field in self._fields:
+            value = rest.pop(field, _MISSING)
+            if value is _MISSING:
+                # unset slots read as missing keys
+                continue
+            if field in self._nested and isinstance(value, Mapping):
+                value = self._nested[field](value)
+            setattr(self, field, value)
+        self._rest = json.dumps(rest, separators=(",", ":")).encode() if rest else b""
+
+    def _decode_rest(self) -> dict[str, Any]:
+        return json.loads(self._rest) if self._rest else {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._fields:
+            value = getattr(self, key, _MISSING)
+            if value is _MISSING:
+                raise KeyError(key)
+            return value
+        return self._decode_rest()[key]
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._fields:
+            return hasattr(self, key)  # type: ignore[arg-type]
+        return key in self._decode_rest()
+
+    def __iter__(self) -> Iterator[str]:
+        yield from (f for f in self._fields if hasattr(self, f))
+        yield from self._decode_rest()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> dict[str, Any]:
+        """The record as the plain dict it was built from."""
+        return {
+            k: v.to_dict() if isinstance(v, CompactRecord) else v
+            for k, v in self.items()
+        }
+
+
+class CompactSparkLine(CompactRecord):
+    __slots__ = ("data", "totalChange")
+    _fields = ("data", "totalChange")
+
+
+class CompactCurrencyLineTransaction(CompactRecord):
+    __slots__ = (
+        "id",
+        "pay_currency_id",
+        "get_currency_id",
+        "value",
+        "count",
+        "data_point_count",
+        "listing_count",
+    )
+    _fields = __slots__
+
+
+class CompactItemLine(CompactRecord):
+    """Dict compatible stand-in for `ItemLine`."""
+
+    __slots__ = (
+        "id",
+        "name",
+        "detailsId",
+        "itemClass",
+        "chaosValue",
+        "divineValue",
+        "exaltedValue",
+        "count",
+        "listingCount",
+        "sparkline",
+        # the fields that tell apart lines sharing a name, read by PriceIndex
+        "baseType",
+        "variant",
+        "links",
+        "gemLevel",
+        "gemQuality",
+        "mapTier",
+        "corrupted",
+    )
+    _fields = __slots__
+    _nested = {"sparkline": CompactSparkLine}
+
+
+class CompactCurrencyLine(CompactRecord):
+    """Dict compatible stand-in for `CurrencyLine`."""
+
+    __slots__ = (
+        "currencyTypeName",
+        "detailsId",
+        "chaosEquivalent",
+        "pay",
+        "receive",
+        "receiveSparkLine",
+    )
+    _fields = __slots__
+    _nested = {
+        "pay": CompactCurrencyLineTransaction,
+        "receive": CompactCurrencyLineTransaction,
+        "receiveSparkLine": CompactSparkLine,
+    }
+
+
+class CompactItemResponse(dict):
+    """An `ItemResponse` whose lines are `CompactItemLine`s."""
+
+    def __init__(self, data: Mapping[str, Any]) -> None:
+        super().__init__(data)
+        self["lines"] = [CompactItemLine(line) for line in data["lines"]]
+
+
+class CompactCurrencyResponse(dict):
+    """A `CurrencyResponse` whose lines are `CompactCurrencyLine`s."""
+
+    def __init__(self, data: Mapping[str, Any]) -> None:
+        super().__init__(data)
+        self["lines"] = [CompactCurrencyLine(line) for line in data["lines"]]
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterable, Iterator
+
+from apiclient import SuccessResponse, TokenBucket
+
+from .ladder import Ladder
+from .models import BuildsResponse, CharacterResponse
+
+if TYPE_CHECKING:
+    from .client import BuildsApi, TimeMachineType
+
+Character = tuple[str, str]  # (account, name)
+
+
+@dataclass
+class CrawlProgress:
+    total: int
+    done: int = 0
+    failed: int = 0
+    # characters found in the checkpoint and not fetched again
+    skipped: int = 0
+    errors: dict[Character, str] = field(default_factory=dict)
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed else 0.0
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.done - self.failed - self.skipped
+
+
+class Checkpoint:
+    """Append-only file of the characters that were fetched successfully."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.done: set[Character] = set()
+        if self.path.exists():
+            with self.path.open() as f:
+                for line in f:
+                    try:
+                        account, name = json.loads(line)
+                    except ValueError:
+                        # a line cut short by a crash
+                        continue
+                    self.done.add((account, name))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a")
+
+    def add(self, character: Character) -> None:
+        self.done.add(character)
+        self._file.write(json.dumps(character) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def ladder_characters(
+    source: Ladder | BuildsResponse | Iterable[Character],
+) -> list[Character]:
+    if isinstance(source, Ladder):
+        return list(zip(source.accounts, source.names))
+    if isinstance(source, dict):
+        return list(zip(source["accounts"], source["names"]))
+    return list(source)
+
+
+async def crawl_characters(
+    api: "BuildsApi",
+    source: Ladder | BuildsResponse | Iterable[Character],
+    concurrency: int = 4,
+    rate: float | None = None,
+    checkpoint: str | Path | None = None,
+    tm: "TimeMachineType" = "",
+    on_progress: Callable[[CrawlProgress], None] | None = None,
+) -> AsyncIterator[CharacterResponse]:
+    """Fetch the characters of a ladder, yielding them as they complete.
+
+    At most `concurrency` requests are in flight and at most `rate` are started
+    per second. Characters are appended to the `checkpoint` file once the
+    consumer has received them, and skipped when a crawl is resumed with the
+    same file.
+    Failures are counted in the progress passed to `on_progress` after every
+    character and are retried by the next resumed crawl. Workers wait for the
+    consumer once `concurrency` characters are waiting to be yielded.
+    """
+    characters = ladder_characters(source)
+    progress = CrawlProgress(total=len(characters))
+    done = Checkpoint(checkpoint) if checkpoint else None
+    bucket = TokenBucket(rate, burst=concurrency) if rate else None
+    if done:
+        todo = [c for c in characters if c not in done.done]
+        progress.skipped = len(characters) - len(todo)
+        if progress.skipped and on_progress:
+            on_progress(progress)
+    else:
+        todo = characters
+    pending: Iterator[Character] = iter(todo)
+    results: asyncio.Queue[tuple[Character, CharacterResponse] | None] = asyncio.Queue(
+        concurrency
+    )
+
+    async def worker():
+        for character in pending:
+            if bucket:
+                await bucket.acquire()
+
+            try:
+                res = await api.get_character(*character, tm=tm)
+            except Exception as e:
+                res = e
+            if isinstance(res, SuccessResponse):
+                progress.done += 1
+            else:
+                progress.failed += 1
+                progress.errors[character] = str(getattr(res, "msg", res))
+            if on_progress:
+                on_progress(progress)
+            if isinstance(res, SuccessResponse):
+                await results.put((character, res.data))
+        # tells the consumer this worker is finished
+        await results.put(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        running = len(workers)
+        while running:
+            result = await results.get()
+            if result is None:
+                running -= 1
+                continue
+            character, data = result
+            # checkpointed as it is handed to the consumer, characters still
+            # queued when the crawl stops are fetched again on resume
+            if done:
+                done.add(character)
+            yield data
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if done:
+            done.close()
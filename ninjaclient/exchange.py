@@ -0,0 +1,183 @@
+import math
+from array import array
+from itertools import compress, repeat
+from operator import gt, mul
+
+from .models import CurrencyLineTransaction, CurrencyResponse
+
+# a chain of trades is a gain once it returns more than this
+_GAIN = 1 + 1e-9
+
+
+class ExchangeGraph:
+    """Conversion rates between currencies, direct and through other currencies.
+
+    `direct[i][j]` is how much of currency j one unit of currency i buys in a
+    single trade (0 when nobody trades it) and `best[i][j]` the most it buys
+    through any chain of trades. Every transaction value is "pay currency per
+    get currency", so paying 1 `pay_currency_id` gets `1 / value`
+    `get_currency_id`.
+
+    When trades form a cycle that ends with more than it started (see
+    `arbitrage`), any currency that can trade into the cycle buys an unbounded
+    amount of any currency the cycle trades into: those rates are `math.inf`
+    and have no path.
+
+    Thin markets can be discounted: transactions with fewer than
+    `min_listings` listings or `min_data_points` data points are ignored, and
+    with `confident_listings` a rate is scaled by
+    `min(1, listing_count / confident_listings)`.
+    """
+
+    def __init__(
+        self,
+        res: CurrencyResponse,
+        min_listings: int = 0,
+        min_data_points: int = 0,
+        confident_listings: int | None = None,
+    ) -> None:
+        self.min_listings = min_listings
+        self.min_data_points = min_data_points
+        self.confident_listings = confident_listings
+
+        names = {d["id"]: d["name"] for d in res.get("currencyDetails", [])}
+        transactions = [
+            t
+            for line in res["lines"]
+            for t in (line.get("pay"), line.get("receive"))
+            if t and self._usable(t)
+        ]
+        ids = sorted(
+            {t["pay_currency_id"] for t in transactions}
+            | {t["get_currency_id"] for t in transactions}
+        )
+        self.ids = ids
+        self.names = [names.get(i, str(i)) for i in ids]
+        self._positions = {name: i for i, name in enumerate(self.names)}
+        self._id_positions = {id: i for i, id in enumerate(ids)}
+
+        n = len(ids)
+        self.direct = [array("d", repeat(0.0, n)) for _ in range(n)]
+        for i in range(n):
+            self.direct[i][i] = 1.0
+        for t in transactions:
+            i = self._id_positions[t["pay_currency_id"]]
+            j = self._id_positions[t["get_currency_id"]]
+            self.direct[i][j] = max(self.direct[i][j], self._rate(t))
+        self._solve()
+
+    def _usable(self, t: CurrencyLineTransaction) -> bool:
+        return (
+            t.get("value", 0) > 0
+            and t.get("listing_count", 0) >= self.min_listings
+            and t.get("data_point_count", 0) >= self.min_data_points
+        )
+
+    def _rate(self, t: CurrencyLineTransaction) -> float:
+        rate = 1 / t["value"]
+        if self.confident_listings:
+            rate *= min(1.0, t.get("listing_count", 0) / self.confident_listings)
+        return rate
+
+    def _solve(self) -> None:
+        """Floyd-Warshall over products of rates, one row at a time.
+
+        Rows are combined with map over arrays so the inner loop runs in C.
+        `_next[i][j]` is the first currency after i on the best path to j.
+        """
+        n = len(self.ids)
+        best = [array("d", row) for row in self.direct]
+        nxt = [array("i", range(n)) for _ in range(n)]
+        for k in range(n):
+            via = best[k]
+            for i in range(n):
+                to_k = best[i][k]
+                if to_k == 0 or i == k:
+                    continue
+                row = best[i]
+                candidate = array("d", map(mul, repeat(to_k, n), via))
+                improved = list(compress(range(n), map(gt, candidate, row)))
+                if improved:
+                    hop = nxt[i][k]
+                    next_row = nxt[i]
+                    for j in improved:
+                        row[j] = candidate[j]
+                        next_row[j] = hop
+        self.best = best
+        self._next = nxt
+
+        # best rates are only well defined over chains that do not loop, once
+        # a gain cycle exists going round it more often is always better
+        self._gains = [k for k in range(n) if best[k][k] > _GAIN]
+        for k in self._gains:
+            into = [i for i in range(n) if best[i][k] > 0]
+            out = [j for j in range(n) if best[k][j] > 0]
+            for i in into:
+                row = best[i]
+                for j in out:
+                    row[j] = math.inf
+
+    def _index(self, currency: str | int) -> int:
+        if isinstance(currency, int):
+            return self._id_positions[currency]
+        return self._positions[currency]
+
+    def rate(self, frm: str | int, to: str | int) -> float:
+        """Most of `to` one `frm` buys, by name or currency id."""
+        return self.best[self._index(frm)][self._index(to)]
+
+    def rates_from(self, frm: str | int) -> dict[str, float]:
+        return dict(zip(self.names, self.best[self._index(frm)]))
+
+    def path(self, frm: str | int, to: str | int) -> list[str]:
+        """The chain of trades behind `rate`, from `frm` to `to` inclusive."""
+        return self._path(self._index(frm), self._index(to))
+
+    def _path(self, i: int, j: int) -> list[str]:
+        if self.best[i][j] in (0, math.inf):
+            return []
+        if i == j:
+            return [self.names[i]]
+        path = [i]
+        # a best chain visits every currency at most once
+        for _ in range(len(self.ids)):
+            i = self._next[i][j]
+            path.append(i)
+            if i == j:
+                break
+        return [self.names[p] for p in path]
+
+    def arbitrage(self, tolerance: float = 1e-9) -> list[tuple[float, list[str]]]:
+        """Cycles of trades that end with more than they started, best first.
+
+        Each cycle is listed once, with the gain of going round it once.
+        """
+        cycles = {}
+        for k in self._gains:
+            # follow the first hops from k back towards k until a currency
+            # repeats, the hops since its first visit are a simple cycle
+            seen = {k: 0}
+            walk = [k]
+            while True:
+                hop = self._next[walk[-1]][k]
+                if hop in seen:
+                    break
+                seen[hop] = len(walk)
+                walk.append(hop)
+            cycle = walk[seen[hop] :]
+            # rotated to start at its lowest position so it is only kept once
+            start = cycle.index(min(cycle))
+            cycle = tuple(cycle[start:] + cycle[:start])
+            gain = math.prod(
+                self.direct[a][b] for a, b in zip(cycle, cycle[1:] + cycle[:1])
+            )
+            if gain > 1 + tolerance:
+                cycles[cycle] = gain
+        return sorted(
+            (
+                (gain, [self.names[p] for p in cycle + cycle[:1]])
+                for cycle, gain in cycles.items()
+            ),
+            key=lambda c: c[0],
+            reverse=True,
+        )
@@ -0,0 +1,159 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterable, get_args
+
+from apiclient import ErrorResponse, SuccessResponse
+
+from .client import EconomyRequestType
+from .models import CurrencyResponse, ItemResponse
+
+if TYPE_CHECKING:
+    from .client import EconomyApi
+
+
+def _prices(line: Any) -> tuple[float, float | None]:
+    if "currencyTypeName" in line:
+        return line["chaosEquivalent"], None
+    return line["chaosValue"], line.get("divineValue")
+
+
+@dataclass(frozen=True, slots=True)
+class PriceChange:
+    details_id: str
+    chaos_before: float
+    chaos_after: float
+    divine_before: float | None
+    divine_after: float | None
+    # the line as it is now
+    line: Any
+
+
+@dataclass
+class EconomyChanges:
+    """What changed in one category since its previous response."""
+
+    category: EconomyRequestType
+    timestamp: float
+    added: list[Any] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)  # detailsIds
+    repriced: list[PriceChange] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.repriced)
+
+
+class EconomyChangeFeed:
+    """Added, removed and repriced lines of economy categories, by detailsId.
+
+    Iterating the feed fetches the categories every `interval` seconds and
+    yields one `EconomyChanges` per category that changed. The first fetch
+    reports every line as added unless `emit_initial` is False. `diff` can
+    also be fed responses from elsewhere, such as a SnapshotRefresher.
+
+    A line is repriced when its chaos value moved by more than
+    `min_chaos_change` or its divine value by more than `min_divine_change`,
+    and by more than `min_relative_change` of its previous value. Prices are
+    compared to the last ones reported, so a slow drift is reported once it
+    adds up past the thresholds.
+    """
+
+    def __init__(
+        self,
+        api: "EconomyApi",
+        categories: Iterable[EconomyRequestType] | None = None,
+        interval: float | None = None,
+        min_chaos_change: float = 0.0,
+        min_divine_change: float = 0.0,
+        min_relative_change: float = 0.0,
+        emit_initial: bool = True,
+        league: str | None = None,
+    ) -> None:
+        self.api = api
+        self.categories = list(categories or get_args(EconomyRequestType))
+        self.interval = interval
+        self.min_chaos_change = min_chaos_change
+        self.min_divine_change = min_divine_change
+        self.min_relative_change = min_relative_change
+        self.emit_initial = emit_initial
+        self.league = league
+        # categories that failed on the latest fetch, they are retried next time
+        self.errors: dict[EconomyRequestType, ErrorResponse] = {}
+        # the last reported (chaos, divine) price of every line, by category
+        self._reported: dict[str, dict[str, tuple[float, float | None]]] = {}
+
+    def _moved(
+        self, before: float | None, after: float | None, min_change: float
+    ) -> bool:
+        if before is None or after is None or math.isnan(before) or math.isnan(after):
+            # a missing price is not a change
+            return False
+        change = abs(after - before)
+        return change > min_change and change > self.min_relative_change * abs(before)
+
+    def diff(
+        self,
+        category: EconomyRequestType,
+        res: CurrencyResponse | ItemResponse,
+        timestamp: float | None = None,
+    ) -> EconomyChanges:
+        """The changes of a new response, which becomes the new baseline."""
+        changes = EconomyChanges(category, timestamp or time.time())
+        initial = category not in self._reported
+        reported = self._reported.setdefault(category, {})
+        seen = set()
+        for line in res["lines"]:
+            details_id = line["detailsId"]
+            seen.add(details_id)
+            chaos, divine = _prices(line)
+            previous = reported.get(details_id)
+            if previous is None:
+                reported[details_id] = (chaos, divine)
+                if not initial or self.emit_initial:
+                    changes.added.append(line)
+                continue
+
+            chaos_before, divine_before = previous
+            if self._moved(chaos_before, chaos, self.min_chaos_change) or self._moved(
+                divine_before, divine, self.min_divine_change
+            ):
+                reported[details_id] = (chaos, divine)
+                changes.repriced.append(
+                    PriceChange(
+                        details_id, chaos_before, chaos, divine_before, divine, line
+                    )
+                )
+
+        changes.removed = [d for d in reported if d not in seen]
+        for details_id in changes.removed:
+            del reported[details_id]
+        return changes
+
+    async def _fetch(self) -> dict[EconomyRequestType, SuccessResponse]:
+        # failures are recorded here even with raise_errors, the feed goes on
+        results, _ = await self.api.request_many(
+            {
+                c: self.api._build_get_category_config(c, self.league)
+                for c in self.categories
+            },
+            self.api.config.snapshot_concurrency,
+            use_cache=False,
+        )
+        self.errors = {c: r for c, r in results.items() if isinstance(r, ErrorResponse)}
+        return {c: r for c, r in results.items() if isinstance(r, SuccessResponse)}
+
+    async def __aiter__(self) -> AsyncIterator[EconomyChanges]:
+        interval = self.interval
+        if interval is None:
+            cfg = self.api._build_get_category_config(self.categories[0])
+            interval = self.api.config.cache_ttl(cfg)
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            timestamp = time.time()
+            for category, res in (await self._fetch()).items():
+                changes = self.diff(category, res.data, timestamp)
+                if changes:
+                    yield changes
+            await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
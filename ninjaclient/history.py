@@ -0,0 +1,124 @@
+from array import array
+from dataclasses import dataclass, field
+from itertools import compress, repeat
+from operator import itemgetter, le, sub
+from typing import Sequence
+
+from .ladder import Dimension, Ladder
+
+Character = tuple[str, str]  # (account, name)
+
+
+def _take(column: Sequence[int], rows: Sequence[int]) -> array:
+    """column[rows] where a row of -1 gives -1."""
+    # the appended -1 is what column[-1] picks for characters missing in a snapshot
+    padded = array("i", column)
+    padded.append(-1)
+    if len(rows) == 1:
+        return array("i", [padded[rows[0]]])
+    return array("i", itemgetter(*rows)(padded)) if rows else array("i")
+
+
+@dataclass
+class LadderHistory:
+    """Several time machine snapshots of a ladder aligned by character.
+
+    `characters` is the union of the characters of all snapshots and
+    `rows[s][c]` is the user id of `characters[c]` in `ladders[s]`, -1 when
+    the character is not on that snapshot. Snapshots keep the order they were
+    given in.
+    """
+
+    snapshots: list[str]
+    ladders: list[Ladder]
+    characters: list[Character]
+    rows: list[array]
+    _positions: dict[Character, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._positions = {c: i for i, c in enumerate(self.characters)}
+
+    @classmethod
+    def align(
+        cls, snapshots: Sequence[str], ladders: Sequence[Ladder]
+    ) -> "LadderHistory":
+        positions: dict[Character, int] = {}
+        for ladder in ladders:
+            for character in zip(ladder.accounts, ladder.names):
+                positions.setdefault(character, len(positions))
+
+        rows = []
+        for ladder in ladders:
+            row = array("i", [-1]) * len(positions)
+            for user_id, character in enumerate(zip(ladder.accounts, ladder.names)):
+                row[positions[character]] = user_id
+            rows.append(row)
+        return cls(list(snapshots), list(ladders), list(positions), rows)
+
+    def __len__(self) -> int:
+        return len(self.characters)
+
+    def index(self, account: str, name: str) -> int:
+        return self._positions[(account, name)]
+
+    def _snapshot(self, snapshot: int | str) -> int:
+        return self.snapshots.index(snapshot) if isinstance(snapshot, str) else snapshot
+
+    def column(self, snapshot: int | str, name: str) -> array:
+        """A per user Ladder column (e.g. "levels") aligned to `characters`."""
+        s = self._snapshot(snapshot)
+        return _take(getattr(self.ladders[s], name), self.rows[s])
+
+    def deltas(
+        self, name: str, start: int | str = 0, end: int | str = -1
+    ) -> dict[Character, int]:
+        """Change of a per user column between two snapshots, e.g. levels gained.
+
+        Only characters present on both snapshots are included.
+        """
+        s, e = self._snapshot(start), self._snapshot(end)
+        before, after = self.column(s, name), self.column(e, name)
+        present = map(le, repeat(0), map(min, self.rows[s], self.rows[e]))
+        return dict(compress(zip(self.characters, map(sub, after, before)), present))
+
+    def classes(self, snapshot: int | str) -> list[str | None]:
+        """Class of every character on a snapshot, None when missing."""
+        s = self._snapshot(snapshot)
+        names = self.ladders[s].class_names + [None]
+        return [names[c] for c in self.column(s, "classes")]
+
+    def adoption(self, dimension: Dimension) -> dict[str, array]:
+        """Users of every label across the snapshots, e.g. keystone popularity."""
+        result: dict[str, array] = {}
+        for s, ladder in enumerate(self.ladders):
+            usage = ladder.usage(dimension)
+            for label, count in zip(usage.labels, usage.counts()):
+                if label not in result:
+                    result[label] = array("q", [0]) * len(self.ladders)
+                result[label][s] = count
+        return result
+
+    def users_of(
+        self, dimension: Dimension, label: str, snapshot: int | str
+    ) -> set[int]:
+        """Characters (indexes into `characters`) using `label` on a snapshot."""
+        s = self._snapshot(snapshot)
+        ladder = self.ladders[s]
+        usage = ladder.usage(dimension)
+        try:
+            users = usage.users_of(label)
+        except KeyError:
+            return set()
+        return {self._positions[(ladder.accounts[u], ladder.names[u])] for u in users}
+
+    def adopters(
+        self,
+        dimension: Dimension,
+        label: str,
+        start: int | str = 0,
+        end: int | str = -1,
+    ) -> tuple[set[int], set[int]]:
+        """Characters that started and stopped using `label` between two snapshots."""
+        before = self.users_of(dimension, label, start)
+        after = self.users_of(dimension, label, end)
+        return after - before, before - after
@@ -0,0 +1,153 @@
+from array import array
+from dataclasses import dataclass, field
+from itertools import accumulate
+from operator import sub
+from typing import Iterable, Literal, Mapping, Sequence
+
+from .models import BuildsResponse, NamedObject
+
+Dimension = Literal["class", "unique", "skill", "gem", "keystone", "mastery"]
+
+
+def int_column(values: Sequence[int]) -> array:
+    """Return `values` as an `array("i")`, without copying if it already is one."""
+    if isinstance(values, array) and values.typecode == "i":
+        return values
+    return array("i", values)
+
+
+@dataclass
+class UsageIndex:
+    """A decoded `*Use` map in CSR layout.
+
+    The user ids of `labels[i]` are `user_ids[offsets[i]:offsets[i + 1]]`, sorted
+    ascending.
+    """
+
+    labels: list[str]
+    offsets: array  # array("q"), len(labels) + 1 entries
+    user_ids: array  # array("i")
+    _positions: dict[str, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._positions = {label: i for i, label in enumerate(self.labels)}
+
+    @classmethod
+    def decode(
+        cls, labels: Iterable[str], use: Mapping[str, Sequence[int]]
+    ) -> "UsageIndex":
+        """Decode a delta encoded `*Use` map, see `BuildsResponse.uniqueItemUse`."""
+        labels = list(labels)
+        offsets = array("q", [0])
+        user_ids = array("i")
+        for i in range(len(labels)):
+            deltas = use.get(str(i))
+            if deltas:
+                # the prefix sum turns the deltas back into user ids
+                user_ids.extend(accumulate(deltas))
+            offsets.append(len(user_ids))
+        return cls(labels, offsets, user_ids)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def index(self, label: str) -> int:
+        return self._positions[label]
+
+    def users(self, i: int) -> memoryview:
+        """User ids of the i-th label, a view into `user_ids`."""
+        return memoryview(self.user_ids)[self.offsets[i] : self.offsets[i + 1]]
+
+    def users_of(self, label: str) -> memoryview:
+        return self.users(self.index(label))
+
+    def counts(self) -> array:
+        """Number of users of every label."""
+        return array("q", map(sub, self.offsets[1:], self.offsets[:-1]))
+
+
+def _names(objects: Iterable[NamedObject]) -> list[str]:
+    return [o["name"] for o in objects]
+
+
+@dataclass
+class Ladder:
+    """A BuildsResponse decoded once into columns.
+
+    Per user columns are indexed by user id. Accepts both plain responses and
+    the compact ones produced by `BuildsStreamParser`.
+    """
+
+    updated_utc: str
+    names: list[str]
+    accounts: list[str]
+    class_names: list[str]
+    classes: array
+    levels: array
+    life: array
+    energy_shield: array
+    ladder_ranks: array
+    delve_solo: array
+    unique_items: UsageIndex
+    active_skills: UsageIndex
+    all_skills: UsageIndex
+    keystones: UsageIndex
+    masteries: UsageIndex
+    # support gems used with each active skill, by skill name
+    support_gems: dict[str, UsageIndex]
+
+    @classmethod
+    def from_response(cls, res: BuildsResponse) -> "Ladder":
+        return cls(
+            updated_utc=res["updatedUtc"],
+            names=res["names"],
+            accounts=res["accounts"],
+            class_names=res["classNames"],
+            classes=int_column(res["classes"]),
+            levels=int_column(res["levels"]),
+            life=int_column(res["life"]),
+            energy_shield=int_column(res["energyShield"]),
+            ladder_ranks=int_column(res["ladderRanks"]),
+            delve_solo=int_column(res.get("delveSolo", [])),
+            unique_items=UsageIndex.decode(
+                _names(res["uniqueItems"]), res["uniqueItemUse"]
+            ),
+            active_skills=UsageIndex.decode(
+                _names(res["activeSkills"]), res["activeSkillUse"]
+            ),
+            all_skills=UsageIndex.decode(_names(res["allSkills"]), res["allSkillUse"]),
+            keystones=UsageIndex.decode(_names(res["keystones"]), res["keystoneUse"]),
+            masteries=UsageIndex.decode(
+                _names(res.get("masteries", [])), res.get("masteryUse", {})
+            ),
+            support_gems={
+                detail["name"]: UsageIndex.decode(
+                    _names(detail["supportGems"]["names"]),
+                    detail["supportGems"]["use"],
+                )
+                for detail in res.get("skillDetails", [])
+            },
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def usage(self, dimension: Dimension) -> UsageIndex:
+        """The users of every label of `dimension`, classes included."""
+        if dimension == "class":
+            by_class: list[list[int]] = [[] for _ in self.class_names]
+            for user_id, c in enumerate(self.classes):
+                by_class[c].append(user_id)
+            offsets = array("q", accumulate(map(len, by_class), initial=0))
+            user_ids = array("i")
+            for users in by_class:
+                user_ids.extend(users)
+            return UsageIndex(self.class_names, offsets, user_ids)
+
+        return {
+            "unique": self.unique_items,
+            "skill": self.active_skills,
+            "gem": self.all_skills,
+            "keystone": self.keystones,
+            "mastery": self.masteries,
+        }[dimension]
@@ -0,0 +1,91 @@
+from dataclasses import dataclass, field
+from typing import Any, Generic, Iterator, Mapping, TypeVar
+
+from apiclient import ErrorResponse
+
+from .ladder import Dimension, Ladder
+from .models import CurrencyResponse, ItemResponse
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class LeagueTable(Generic[_T]):
+    """Values of the same rows across several leagues, aligned by key.
+
+    `rows[key][i]` is the value of `key` in `leagues[i]`, None when that league
+    has no such row. Keys keep the order they are first seen in, going through
+    the leagues in order. Leagues that failed to fetch are in `errors` and have
+    a None in every row.
+    """
+
+    leagues: list[str]
+    rows: dict[str, list[_T | None]] = field(default_factory=dict)
+    errors: dict[str, ErrorResponse] = field(default_factory=dict)
+
+    @classmethod
+    def align(
+        cls,
+        leagues: list[str],
+        columns: Mapping[str, Mapping[str, _T]],
+        errors: Mapping[str, ErrorResponse] | None = None,
+    ) -> "LeagueTable[_T]":
+        """Align per league `{key: value}` columns into rows."""
+        rows: dict[str, list[_T | None]] = {}
+        for i, league in enumerate(leagues):
+            for key, value in columns.get(league, {}).items():
+                row = rows.get(key)
+                if row is None:
+                    row = rows[key] = [None] * len(leagues)
+                row[i] = value
+        return cls(leagues, rows, dict(errors or {}))
+
+    @classmethod
+    def from_responses(
+        cls,
+        leagues: list[str],
+        responses: Mapping[str, CurrencyResponse | ItemResponse],
+        errors: Mapping[str, ErrorResponse] | None = None,
+    ) -> "LeagueTable[Any]":
+        """Economy lines by `detailsId`."""
+        columns = {
+            league: {line["detailsId"]: line for line in res["lines"]}
+            for league, res in responses.items()
+        }
+        return cls.align(leagues, columns, errors)
+
+    @classmethod
+    def from_ladders(
+        cls,
+        leagues: list[str],
+        ladders: Mapping[str, Ladder],
+        dimension: Dimension,
+        errors: Mapping[str, ErrorResponse] | None = None,
+    ) -> "LeagueTable[int]":
+        """Number of characters using every label of `dimension`, by name."""
+        columns = {}
+        for league, ladder in ladders.items():
+            usage = ladder.usage(dimension)
+            columns[league] = dict(zip(usage.labels, usage.counts()))
+        return cls.align(leagues, columns, errors)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.rows)
+
+    def __getitem__(self, key: str) -> list[_T | None]:
+        return self.rows[key]
+
+    def column(self, league: str) -> dict[str, _T]:
+        """The rows present in one league."""
+        i = self.leagues.index(league)
+        return {k: row[i] for k, row in self.rows.items() if row[i] is not None}
+
+    def values(self, name: str) -> dict[str, list[Any]]:
+        """One field of every line, e.g. `values("chaosValue")`."""
+        return {
+            key: [line.get(name) if line is not None else None for line in row]
+            for key, row in self.rows.items()
+        }
@@ -1,4 +1,4 @@
-from typing import Generic, Literal, TypedDict, TypeVar
+from typing import Generic, Literal, NotRequired, TypedDict, TypeVar
 
 
 class SparkLine(TypedDict):
@@ -80,6 +80,15 @@ class ItemLine(TypedDict):
     count: int
     detailsId: str
     listingCount: int
+    # only present on the categories they distinguish items in
+    baseType: NotRequired[str]
+    variant: NotRequired[str]
+    links: NotRequired[int]
+    gemLevel: NotRequired[int]
+    gemQuality: NotRequired[int]
+    mapTier: NotRequired[int]
+    levelRequired: NotRequired[int]
+    corrupted: NotRequired[bool]
 
 
 class ItemResponse(TypedDict):
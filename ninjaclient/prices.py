@@ -0,0 +1,190 @@
+from bisect import insort
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Mapping
+
+from .models import CurrencyResponse, ItemResponse
+
+if TYPE_CHECKING:
+    from .client import EconomyRequestType, EconomySnapshot
+
+
+# lookup arguments of an item without variants
+_PLAIN = (None, None, None, None, None, False)
+
+
+def normalize(name: str) -> str:
+    return name.strip().casefold()
+
+
+def _divine_rate(res: CurrencyResponse) -> float | None:
+    """Chaos value of a Divine Orb in a currency response, if it is listed."""
+    return next(
+        (
+            line["chaosEquivalent"]
+            for line in res["lines"]
+            if line["detailsId"] == "divine-orb"
+        ),
+        None,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class PriceRecord:
+    category: "EconomyRequestType"
+    name: str
+    details_id: str
+    chaos_value: float
+    divine_value: float | None
+    listing_count: int
+    base_type: str | None = None
+    links: int | None = None
+    gem_level: int | None = None
+    gem_quality: int | None = None
+    map_tier: int | None = None
+    variant: str | None = None
+    corrupted: bool | None = None
+
+    @property
+    def specificity(self) -> int:
+        """Number of variant fields set, the plain item has 0."""
+        return sum(
+            getattr(self, f) is not None
+            for f in ("links", "gem_level", "gem_quality", "map_tier", "variant")
+        ) + bool(self.corrupted)
+
+
+class PriceIndex:
+    """Prices of every line of an economy snapshot, across categories.
+
+    Records are found in O(1) by `detailsId`, by name, or by name plus the
+    fields that distinguish variants of an item (links, gem level/quality, map
+    tier, variant, corruption). A plain name lookup returns the least specific
+    record, e.g. the unlinked version of a unique.
+    """
+
+    def __init__(self) -> None:
+        self._by_details_id: dict[str, PriceRecord] = {}
+        self._by_name: dict[str, list[PriceRecord]] = {}
+        self._by_variant: dict[tuple, PriceRecord] = {}
+        self._default: dict[str, PriceRecord] = {}
+        self._by_base_type: dict[str, list[PriceRecord]] = {}
+
+    @classmethod
+    def from_snapshot(cls, snapshot: "EconomySnapshot") -> "PriceIndex":
+        index = cls()
+        # only the Currency category lists the Divine Orb, the other currency
+        # categories are priced with its rate
+        currency = snapshot.currencies.get("Currency")
+        divine = _divine_rate(currency) if currency is not None else None
+        for category, res in snapshot.currencies.items():
+            index.add_currencies(category, res, divine)
+        for category, res in snapshot.items.items():
+            index.add_items(category, res)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._by_details_id)
+
+    def _add(self, record: PriceRecord) -> None:
+        self._by_details_id[record.details_id] = record
+        name = normalize(record.name)
+        records = self._by_name.setdefault(name, [])
+        # least specific first, then the most liquid
+        insort(records, record, key=lambda r: (r.specificity, -r.listing_count))
+        self._default[name] = records[0]
+        self._by_variant.setdefault(self._variant_key(name, record), record)
+        if record.base_type:
+            self._by_base_type.setdefault(normalize(record.base_type), []).append(
+                record
+            )
+
+    @staticmethod
+    def _variant_key(name: str, record: PriceRecord) -> tuple:
+        return (
+            name,
+            record.links,
+            record.gem_level,
+            record.gem_quality,
+            record.map_tier,
+            record.variant,
+            bool(record.corrupted),
+        )
+
+    def add_currencies(
+        self,
+        category: "EconomyRequestType",
+        res: CurrencyResponse,
+        divine: float | None = None,
+    ) -> None:
+        """`divine` is the chaos value of a Divine Orb, by default from `res`."""
+        divine = divine or _divine_rate(res)
+        for line in res["lines"]:
+            receive = line.get("receive") or {}
+            chaos = line["chaosEquivalent"]
+            self._add(
+                PriceRecord(
+                    category=category,
+                    name=line["currencyTypeName"],
+                    details_id=line["detailsId"],
+                    chaos_value=chaos,
+                    divine_value=chaos / divine if divine else None,
+                    listing_count=receive.get("listing_count", 0),
+                )
+            )
+
+    def add_items(self, category: "EconomyRequestType", res: ItemResponse) -> None:
+        for line in res["lines"]:
+            self._add(
+                PriceRecord(
+                    category=category,
+                    name=line["name"],
+                    details_id=line["detailsId"],
+                    chaos_value=line["chaosValue"],
+                    divine_value=line.get("divineValue"),
+                    listing_count=line.get("listingCount", 0),
+                    base_type=line.get("baseType"),
+                    links=line.get("links"),
+                    gem_level=line.get("gemLevel"),
+                    gem_quality=line.get("gemQuality"),
+                    map_tier=line.get("mapTier"),
+                    variant=line.get("variant"),
+                    corrupted=line.get("corrupted"),
+                )
+            )
+
+    def by_details_id(self, details_id: str) -> PriceRecord | None:
+        return self._by_details_id.get(details_id)
+
+    def by_base_type(self, base_type: str) -> list[PriceRecord]:
+        """Every record of an item base, e.g. all uniques on a base."""
+        return list(self._by_base_type.get(normalize(base_type), []))
+
+    def variants(self, name: str) -> list[PriceRecord]:
+        """Every record with this name, least specific first."""
+        return list(self._by_name.get(normalize(name), []))
+
+    def lookup(
+        self,
+        name: str,
+        links: int | None = None,
+        gem_level: int | None = None,
+        gem_quality: int | None = None,
+        map_tier: int | None = None,
+        variant: str | None = None,
+        corrupted: bool = False,
+    ) -> PriceRecord | None:
+        name = normalize(name)
+        fields = (links, gem_level, gem_quality, map_tier, variant, corrupted)
+        if fields == _PLAIN:
+            return self._default.get(name)
+        return self._by_variant.get((name, *fields))
+
+    def lookup_many(self, names: Iterable[str]) -> list[PriceRecord | None]:
+        """Plain name lookups of many items in one call."""
+        return list(map(self._default.get, map(normalize, names)))
+
+    def lookup_items(
+        self, items: Iterable[Mapping[str, object]]
+    ) -> list[PriceRecord | None]:
+        """Lookups of many items given as dicts of `lookup` keyword arguments."""
+        return [self.lookup(**item) for item in items]
@@ -0,0 +1,125 @@
+from typing import Iterable, Iterator, get_args
+
+from .ladder import Dimension, Ladder, UsageIndex
+
+
+def to_bitset(user_ids: Iterable[int], users: int) -> int:
+    """Pack user ids into an int whose bit `i` is set when user `i` is present."""
+    bits = bytearray((users + 7) // 8)
+    for u in user_ids:
+        bits[u >> 3] |= 1 << (u & 7)
+    return int.from_bytes(bits, "little")
+
+
+class Users:
+    """A set of ladder users stored as a bitset.
+
+    Combine with `&`, `|`, `-` and `~`. All operations are single big int
+    operations so they stay cheap even on the full ladder.
+    """
+
+    __slots__ = ("bits", "_universe")
+
+    def __init__(self, bits: int, universe: int) -> None:
+        self.bits = bits
+        self._universe = universe
+
+    def __and__(self, other: "Users") -> "Users":
+        return Users(self.bits & other.bits, self._universe)
+
+    def __or__(self, other: "Users") -> "Users":
+        return Users(self.bits | other.bits, self._universe)
+
+    def __sub__(self, other: "Users") -> "Users":
+        return Users(self.bits & ~other.bits, self._universe)
+
+    def __invert__(self) -> "Users":
+        return Users(self._universe & ~self.bits, self._universe)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Users) and self.bits == other.bits
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.user_ids())
+
+    def user_ids(self) -> list[int]:
+        # reversed binary string so that index == user id
+        s = bin(self.bits)[:1:-1]
+        return [i for i, c in enumerate(s) if c == "1"]
+
+    def share(self, of: "Users") -> float:
+        """Fraction of `of` that is also in this set."""
+        total = len(of)
+        return len(self & of) / total if total else 0.0
+
+
+class LadderIndex:
+    """Inverted index answering boolean queries over a ladder.
+
+    Every class, unique item, active skill, gem, keystone and mastery is
+    stored as a bitset over user ids, e.g. the share of Juggernauts using
+    Resolute Technique with Boneshatter is::
+
+        jugg_boneshatter = idx.get("class", "Juggernaut") & idx.get("skill", "Boneshatter")
+        idx.get("keystone", "Resolute Technique").share(jugg_boneshatter)
+    """
+
+    def __init__(self, ladder: Ladder) -> None:
+        users = len(ladder)
+        self.users = users
+        self.all = Users((1 << users) - 1, (1 << users) - 1)
+
+        self._bitsets: dict[Dimension, dict[str, int]] = {
+            dimension: self._index(ladder.usage(dimension))
+            for dimension in get_args(Dimension)
+        }
+
+    def _index(self, usage: UsageIndex) -> dict[str, int]:
+        return {
+            label: to_bitset(usage.users(i), self.users)
+            for i, label in enumerate(usage.labels)
+        }
+
+    def labels(self, dimension: Dimension) -> list[str]:
+        return list(self._bitsets[dimension])
+
+    def get(self, dimension: Dimension, label: str) -> Users:
+        """Users with `label`, an empty set for labels that are not on the ladder."""
+        return Users(self._bitsets[dimension].get(label, 0), self.all.bits)
+
+    def any_of(self, dimension: Dimension, labels: Iterable[str]) -> Users:
+        result = 0
+        for label in labels:
+            result |= self._bitsets[dimension].get(label, 0)
+        return Users(result, self.all.bits)
+
+    def counts(
+        self, dimension: Dimension, within: Users | None = None
+    ) -> dict[str, int]:
+        """Number of users per label of `dimension`, most used first.
+
+        With `within` this is a co-occurrence table, e.g. the keystones used by
+        the users of a skill.
+        """
+        mask = self.all.bits if within is None else within.bits
+        counts = {
+            label: (bits & mask).bit_count()
+            for label, bits in self._bitsets[dimension].items()
+        }
+        return dict(sorted(counts.items(), key=lambda kv: kv[1], reverse=True))
+
+    def co_occurrence(
+        self, rows: Dimension, columns: Dimension, within: Users | None = None
+    ) -> dict[str, dict[str, int]]:
+        """Users per pair of labels, e.g. keystones per class."""
+        mask = self.all.bits if within is None else within.bits
+        return {
+            row: self.counts(columns, Users(bits & mask, self.all.bits))
+            for row, bits in self._bitsets[rows].items()
+        }
@@ -0,0 +1,221 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from apiclient import ErrorResponse, SuccessResponse
+
+from .ladder import Ladder
+
+if TYPE_CHECKING:
+    from .client import (
+        BuildAndCharOverviewType,
+        BuildsApi,
+        EconomyApi,
+        EconomyRequestType,
+    )
+
+Fetch = Callable[[], Awaitable[SuccessResponse | ErrorResponse]]
+
+
+def _job_name(base: str, league: str | None, language: str | None) -> str:
+    return ":".join([base] + [o for o in (league, language) if o])
+
+
+@dataclass
+class RefreshState:
+    # the latest successfully fetched value, None until the first success
+    value: Any = None
+    # time.time() of the latest success
+    updated: float | None = None
+    # the latest failure, cleared by the next success
+    error: str | None = None
+    consecutive_failures: int = 0
+    refreshes: int = 0
+
+    @property
+    def age(self) -> float | None:
+        return time.time() - self.updated if self.updated is not None else None
+
+
+@dataclass
+class _Job:
+    fetch: Fetch
+    interval: float
+    retry_interval: float
+    transform: Callable[[Any], Any] | None
+    state: RefreshState
+    ready: asyncio.Event
+    running: asyncio.Task | None = None
+    loop: asyncio.Task | None = None
+
+
+class SnapshotRefresher:
+    """Keeps a set of responses fresh in the background.
+
+    Every job is refetched on its own cadence, randomized by +-`jitter` (a
+    fraction of the interval) so jobs with the same interval drift apart. When
+    started, the first refresh of each job is spread evenly over `stagger`
+    seconds instead of all firing at once.
+
+    `get` never waits on the network: it returns the latest completed value,
+    which is kept while a refresh is running and after one fails. Failed
+    refreshes are retried after `retry_interval`.
+    """
+
+    def __init__(self, jitter: float = 0.1, stagger: float = 5.0) -> None:
+        self.jitter = jitter
+        self.stagger = stagger
+        self._jobs: dict[str, _Job] = {}
+        self._started = False
+
+    def add(
+        self,
+        name: str,
+        fetch: Fetch,
+        interval: float,
+        retry_interval: float | None = None,
+        transform: Callable[[Any], Any] | None = None,
+    ) -> None:
+        """Refresh `fetch` every `interval` seconds, `transform` maps its data."""
+        if name in self._jobs:
+            raise ValueError(f"Duplicate refresh job: {name}")
+        self._jobs[name] = job = _Job(
+            fetch,
+            interval,
+            retry_interval if retry_interval is not None else interval,
+            transform,
+            RefreshState(),
+            asyncio.Event(),
+        )
+        if self._started:
+            job.loop = asyncio.create_task(self._run(job, 0))
+
+    def add_category(
+        self,
+        api: "EconomyApi",
+        category: "EconomyRequestType",
+        interval: float | None = None,
+        retry_interval: float | None = None,
+        league: str | None = None,
+        language: str | None = None,
+        name: str | None = None,
+    ) -> None:
+        """Refresh an economy category, by default at its cache ttl.
+
+        The job is named after the category, followed by the league and
+        language overrides given, e.g. "Oil:Standard". Pass `name` to refresh
+        the same category from clients configured for different leagues.
+        """
+        cfg = api._build_get_category_config(category, league, language)
+        self.add(
+            name or _job_name(category, league, language),
+            lambda: api.request(cfg, use_cache=False),
+            interval or api.config.cache_ttl(cfg),
+            retry_interval,
+        )
+
+    def add_ladder(
+        self,
+        api: "BuildsApi",
+        type: "BuildAndCharOverviewType" = "exp",
+        interval: float | None = None,
+        retry_interval: float | None = None,
+        stream: bool = False,
+        league: str | None = None,
+        language: str | None = None,
+        name: str | None = None,
+    ) -> None:
+        """Refresh a ladder, stored as a `Ladder`.
+
+        The job is named like `add_category` names it, after the ladder type.
+        """
+        cfg = api._build_get_builds_config(type, "", stream, league, language)
+        self.add(
+            name or _job_name(type, league, language),
+            lambda: api.request(cfg, use_cache=False),
+            interval or api.config.cache_ttl(cfg),
+            retry_interval,
+            Ladder.from_response,
+        )
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._jobs
+
+    def get(self, name: str) -> Any:
+        """The latest value of a job, None if it never succeeded."""
+        return self._jobs[name].state.value
+
+    def state(self, name: str) -> RefreshState:
+        return self._jobs[name].state
+
+    async def wait_ready(self, *names: str) -> None:
+        """Wait until every named job (by default all) has a value."""
+        for name in names or list(self._jobs):
+            await self._jobs[name].ready.wait()
+
+    async def refresh(self, name: str) -> RefreshState:
+        """Refresh a job now, joining the refresh already running if any."""
+        job = self._jobs[name]
+        await self._join(job)
+        return job.state
+
+    async def _join(self, job: _Job) -> None:
+        if job.running is None:
+            job.running = asyncio.create_task(self._refresh(job))
+            job.running.add_done_callback(lambda _: setattr(job, "running", None))
+        # a cancelled reader does not cancel the refresh
+        await asyncio.shield(job.running)
+
+    async def _refresh(self, job: _Job) -> None:
+        state = job.state
+        try:
+            res = await job.fetch()
+            if isinstance(res, ErrorResponse):
+                raise RuntimeError(res.msg)
+            value = job.transform(res.data) if job.transform else res.data
+        except Exception as e:
+            state.error = str(e) or type(e).__name__
+            state.consecutive_failures += 1
+            return
+        state.value = value
+        state.updated = time.time()
+        state.error = None
+        state.consecutive_failures = 0
+        state.refreshes += 1
+        job.ready.set()
+
+    async def _run(self, job: _Job, delay: float) -> None:
+        await asyncio.sleep(delay)
+        while True:
+            await self._join(job)
+            interval = job.retry_interval if job.state.error else job.interval
+            await asyncio.sleep(
+                interval * (1 + random.uniform(-self.jitter, self.jitter))
+            )
+
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        jobs = list(self._jobs.values())
+        for i, job in enumerate(jobs):
+            job.loop = asyncio.create_task(self._run(job, self.stagger * i / len(jobs)))
+
+    async def stop(self) -> None:
+        self._started = False
+        tasks = [job.loop for job in self._jobs.values() if job.loop]
+        tasks += [job.running for job in self._jobs.values() if job.running]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self._jobs.values():
+            job.loop = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *_):
+        await self.stop()
@@ -0,0 +1,283 @@
+import json
+import math
+import mmap
+import os
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+from .ladder import Ladder, UsageIndex
+from .models import CurrencyResponse, ItemResponse
+
+if TYPE_CHECKING:
+    from .client import EconomyRequestType, EconomySnapshot
+
+PriceColumn = Literal["chaos", "divine", "listings"]
+
+# file name and array typecode of every economy column
+_ECONOMY_COLUMNS = {
+    "chaos": ("chaos.f64", "d"),
+    "divine": ("divine.f64", "d"),
+    "listings": ("listings.i32", "i"),
+}
+_LADDER_COLUMNS = (
+    "classes",
+    "levels",
+    "life",
+    "energy_shield",
+    "ladder_ranks",
+    "delve_solo",
+)
+_LADDER_USAGE = (
+    "unique_items",
+    "active_skills",
+    "all_skills",
+    "keystones",
+    "masteries",
+)
+
+
+def _append(path: Path, values: array) -> None:
+    with path.open("ab") as f:
+        values.tofile(f)
+
+
+def _write_at(path: Path, index: int, values: array) -> None:
+    """Write values from position `index` on, over whatever was there."""
+    with path.open("r+b" if path.exists() else "wb") as f:
+        f.seek(index * values.itemsize)
+        values.tofile(f)
+
+
+def _read(path: Path, typecode: str) -> array:
+    """Read a whole column file into an array."""
+    values = array(typecode)
+    if path.exists():
+        data = path.read_bytes()
+        # ignore a partially written trailing value
+        values.frombytes(data[: len(data) - len(data) % values.itemsize])
+    return values
+
+
+def _map(path: Path, typecode: str) -> memoryview:
+    """Memory map a column file read-only, pages are only read when touched."""
+    if not path.exists() or path.stat().st_size == 0:
+        return memoryview(array(typecode))
+    with path.open("rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    # ignore a partially written trailing value
+    usable = len(view) - len(view) % array(typecode).itemsize
+    return view[:usable].cast(typecode)
+
+
+def _write_json(path: Path, data: object) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+class SnapshotStore:
+    """Append-only columnar store of economy and ladder snapshots.
+
+    Economy snapshots are kept per category in one file per column.
+    `rows.i32` holds the detailsId slot of each row, and each snapshot's rows
+    are sorted by slot. `ends.i64` holds the row where each snapshot ends, and
+    `times.f64` its timestamp. The times file is written last and its length
+    is the number of committed snapshots, so the next append drops whatever a
+    crash mid-append left past them. The row columns are memory mapped and
+    binary searched by history queries, so they read only the pages they
+    need. They are never truncated, an append writes over rows left by a
+    crash, so maps held by readers stay valid. The small ends and times files
+    are read whole instead of mapped.
+
+    Each ladder snapshot is a directory of `array("i")` column files plus a
+    meta.json of names and labels. It is loaded back as a Ladder whose
+    columns are memory mapped.
+    """
+
+    def __init__(self, root: str | os.PathLike) -> None:
+        self.root = Path(root)
+        self._ids: dict[str, list[str]] = {}
+        self._slots: dict[str, dict[str, int]] = {}
+
+    def _category_dir(self, category: "EconomyRequestType") -> Path:
+        return self.root / "economy" / category
+
+    def _details_ids(self, category: "EconomyRequestType") -> list[str]:
+        if category not in self._ids:
+            path = self._category_dir(category) / "ids.json"
+            self._ids[category] = json.loads(path.read_text()) if path.exists() else []
+        return self._ids[category]
+
+    def _details_slots(self, category: "EconomyRequestType") -> dict[str, int]:
+        if category not in self._slots:
+            ids = self._details_ids(category)
+            self._slots[category] = {d: i for i, d in enumerate(ids)}
+        return self._slots[category]
+
+    def append_economy(
+        self,
+        category: "EconomyRequestType",
+        res: CurrencyResponse | ItemResponse,
+        timestamp: float | None = None,
+    ) -> None:
+        directory = self._category_dir(category)
+        directory.mkdir(parents=True, exist_ok=True)
+        ids = self._details_ids(category)
+        slots = self._details_slots(category)
+
+        rows = []
+        for line in res["lines"]:
+            if "currencyTypeName" in line:
+                receive = line.get("receive") or {}
+                values = (
+                    line["chaosEquivalent"],
+                    math.nan,
+                    receive.get("listing_count", 0),
+                )
+            else:
+                values = (
+                    line["chaosValue"],
+                    line.get("divineValue", math.nan),
+                    line.get("listingCount", 0),
+                )
+            slot = slots.get(line["detailsId"])
+            if slot is None:
+                slot = slots[line["detailsId"]] = len(ids)
+                ids.append(line["detailsId"])
+            rows.append((slot, *values))
+        timestamp = timestamp or time.time()
+        times = self.snapshot_times(category)
+        if times and timestamp < times[-1]:
+            # price_history binary searches the times
+            raise ValueError(
+                f"Snapshot at {timestamp} is older than the last one at {times[-1]}"
+            )
+        rows.sort()
+        _write_json(directory / "ids.json", ids)
+
+        committed = len(times)
+        ends = _read(directory / "ends.i64", "q")
+        start = ends[committed - 1] if committed else 0
+        # anything past the committed snapshots was left by an interrupted
+        # append, drop it. no reader maps these two files
+        for name, itemsize in (("times.f64", 8), ("ends.i64", 8)):
+            path = directory / name
+            if path.exists():
+                with path.open("r+b") as f:
+                    f.truncate(committed * itemsize)
+        _write_at(directory / "rows.i32", start, array("i", (r[0] for r in rows)))
+        for i, (name, typecode) in enumerate(_ECONOMY_COLUMNS.values(), 1):
+            _write_at(directory / name, start, array(typecode, (r[i] for r in rows)))
+        _append(directory / "ends.i64", array("q", [start + len(rows)]))
+        _append(directory / "times.f64", array("d", [timestamp]))
+
+    def append_snapshot(
+        self, snapshot: "EconomySnapshot", timestamp: float | None = None
+    ) -> None:
+        """Append every category of an economy snapshot under one timestamp."""
+        timestamp = timestamp or time.time()
+        for category, res in (snapshot.currencies | snapshot.items).items():
+            self.append_economy(category, res, timestamp)
+
+    def snapshot_times(self, category: "EconomyRequestType") -> array:
+        return _read(self._category_dir(category) / "times.f64", "d")
+
+    def price_history(
+        self,
+        category: "EconomyRequestType",
+        details_id: str,
+        since: float | None = None,
+        until: float | None = None,
+        column: PriceColumn = "chaos",
+    ) -> list[tuple[float, float]]:
+        """(timestamp, value) of one item for every snapshot in [since, until]."""
+        slot = self._details_slots(category).get(details_id)
+        if slot is None:
+            return []
+
+        directory = self._category_dir(category)
+        times = self.snapshot_times(category)
+        ends = _read(directory / "ends.i64", "q")
+        rows = _map(directory / "rows.i32", "i")
+        name, typecode = _ECONOMY_COLUMNS[column]
+        values = _map(directory / name, typecode)
+
+        first = bisect_left(times, since) if since is not None else 0
+        last = bisect_right(times, until) if until is not None else len(times)
+        history = []
+        for s in range(first, min(last, len(ends))):
+            lo = ends[s - 1] if s else 0
+            row = bisect_left(rows, slot, lo, ends[s])
+            if row < ends[s] and rows[row] == slot:
+                history.append((times[s], values[row]))
+        return history
+
+    def _ladder_dir(self, name: str) -> Path:
+        return self.root / "ladders" / name
+
+    def append_ladder(
+        self, name: str, ladder: Ladder, timestamp: float | None = None
+    ) -> None:
+        timestamp = timestamp or time.time()
+        directory = self._ladder_dir(name) / f"{int(timestamp * 1000)}"
+        directory.mkdir(parents=True, exist_ok=True)
+        for column in _LADDER_COLUMNS:
+            (directory / f"{column}.i32").write_bytes(
+                array("i", getattr(ladder, column)).tobytes()
+            )
+        for column in _LADDER_USAGE:
+            usage: UsageIndex = getattr(ladder, column)
+            (directory / f"{column}.offsets.i64").write_bytes(usage.offsets.tobytes())
+            (directory / f"{column}.users.i32").write_bytes(usage.user_ids.tobytes())
+        # written last, a ladder without meta.json is incomplete and skipped
+        _write_json(
+            directory / "meta.json",
+            {
+                "timestamp": timestamp,
+                "updated_utc": ladder.updated_utc,
+                "names": ladder.names,
+                "accounts": ladder.accounts,
+                "class_names": ladder.class_names,
+                "labels": {c: getattr(ladder, c).labels for c in _LADDER_USAGE},
+            },
+        )
+
+    def ladder_times(self, name: str) -> list[float]:
+        directory = self._ladder_dir(name)
+        if not directory.exists():
+            return []
+        return sorted(
+            int(d.name) / 1000
+            for d in directory.iterdir()
+            if (d / "meta.json").exists()
+        )
+
+    def load_ladder(self, name: str, timestamp: float) -> Ladder:
+        """A stored ladder whose columns are memory mapped instead of read.
+
+        Support gem usage is not stored.
+        """
+        directory = self._ladder_dir(name) / f"{int(timestamp * 1000)}"
+        meta = json.loads((directory / "meta.json").read_text())
+        columns = {c: _map(directory / f"{c}.i32", "i") for c in _LADDER_COLUMNS}
+        usage = {
+            c: UsageIndex(
+                meta["labels"][c],
+                _map(directory / f"{c}.offsets.i64", "q"),
+                _map(directory / f"{c}.users.i32", "i"),
+            )
+            for c in _LADDER_USAGE
+        }
+        return Ladder(
+            updated_utc=meta["updated_utc"],
+            names=meta["names"],
+            accounts=meta["accounts"],
+            class_names=meta["class_names"],
+            support_gems={},
+            **columns,
+            **usage,
+        )
@@ -0,0 +1,47 @@
+from array import array
+from typing import Any
+
+from apiclient import JsonObjectStreamParser
+
+# per user columns of BuildsResponse, filled straight into typed arrays
+BUILDS_INT_COLUMNS = (
+    "classes",
+    "levels",
+    "life",
+    "energyShield",
+    "ladderRanks",
+    "delveSolo",
+    "fetchModeUse",
+    "weaponConfigurationTypeUse",
+)
+
+# delta encoded user id lists, see BuildsResponse.uniqueItemUse
+BUILDS_USE_MAPS = (
+    "uniqueItemUse",
+    "activeSkillUse",
+    "allSkillUse",
+    "keystoneUse",
+    "masteryUse",
+    "skillModeUse",
+)
+
+
+class BuildsStreamParser(JsonObjectStreamParser):
+    """Parses a BuildsResponse while it downloads into a compact BuildsResponse.
+
+    The result has the same keys as BuildsResponse but the per user columns are
+    `array("i")`s and the lists of the `*Use` maps (including
+    `skillDetails[].supportGems.use`) are still delta encoded `array("i")`s.
+    The full intermediate dict of python ints is never built.
+    """
+
+    typed_arrays = {column: "i" for column in BUILDS_INT_COLUMNS}
+
+    def convert(self, key: str, value: Any) -> Any:
+        if key in BUILDS_USE_MAPS:
+            return array("i", value)
+        if key == "skillDetails":
+            use = value["supportGems"]["use"]
+            for k, v in use.items():
+                use[k] = array("i", v)
+        return value
@@ -1,10 +1,32 @@
-from typing import Any, Callable, Generic, Iterable, TypeVar
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Generic, Iterable, TypeVar
 
+from aiohttp import web
+from aiohttp.test_utils import TestServer
 from pytest import mark
 
+from benchmarks.fixtures import delta_encode, fake_builds_response
+
 
 def has_all_keys(o: Any, keys: list[str]) -> bool:
     for k in keys:
         if not k in o:
             return False
     return True
+
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+
+@asynccontextmanager
+async def serve(routes: dict[str, Handler]) -> AsyncIterator[str]:
+    """Run a local stand-in for poe.ninja and yield its base url."""
+    app = web.Application()
+    for path, handler in routes.items():
+        app.router.add_get(path, handler)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        yield str(server.make_url("")).rstrip("/")
+    finally:
+        await server.close()
@@ -0,0 +1,83 @@
+from aiohttp import web
+from pytest import mark
+
+from apiclient import ResponseCache
+from ninjaclient import BuildsApi, EconomyApi, NinjaConfig
+
+from . import serve
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", 1, ttl=10)
+    cache.put("b", 2, ttl=10)
+    assert cache.get("a") == 1
+    cache.put("c", 3, ttl=10)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (3, 1, 1)
+
+
+def test_byte_budget():
+    cache = ResponseCache(max_entries=10, max_bytes=100)
+    cache.put("a", 1, ttl=10, size=60)
+    cache.put("b", 2, ttl=10, size=60)
+    assert cache.get("a") is None
+    assert cache.size == 60
+    cache.put("huge", 3, ttl=10, size=101)
+    assert cache.get("huge") is None and cache.get("b") == 2
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=10, clock=clock)
+    cache.put("a", 1, ttl=5)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5
+    assert cache.get("a") is None
+    assert cache.stats.expirations == 1 and len(cache) == 0
+
+
+def test_keep_stale():
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=1, clock=clock, keep_stale=True)
+    cache.put("a", 1, ttl=5)
+    clock.now = 5
+    assert cache.get("a") is None and cache.get_stale("a") == 1
+    # stale entries are still evicted like any other
+    cache.put("b", 2, ttl=5)
+    assert cache.get_stale("a") is None
+
+
+@mark.asyncio
+async def test_client_cache():
+    calls = 0
+
+    async def overview(request: web.Request):
+        nonlocal calls
+        calls += 1
+        return web.json_response({"lines": [], "language": {"name": "en"}})
+
+    async with serve({"/currencyoverview": overview}) as url:
+        async with EconomyApi(NinjaConfig(base_url=url, cache_max_entries=8)) as api:
+            first = await api.get_currency()
+            assert await api.get_currency() is first
+            await api.get_fragments()
+            assert calls == 2
+            assert (api.cache.stats.hits, api.cache.stats.misses) == (1, 2)
+
+
+def test_time_machine_ttl():
+    cfg = NinjaConfig()
+    api = BuildsApi(cfg)
+    assert cfg.cache_ttl(api._build_get_builds_config("exp", "")) == 600
+    assert cfg.cache_ttl(api._build_get_builds_config("exp", "week-1")) == float("inf")
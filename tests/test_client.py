@@ -0,0 +1,155 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+from pytest import mark
+
+from apiclient import SuccessResponse, create_session
+from ninjaclient import BuildsApi, EconomyApi, NinjaConfig
+
+from . import serve
+
+
+async def overview(request: web.Request):
+    return web.json_response({"lines": [], "language": {"name": "en"}})
+
+
+@mark.asyncio
+async def test_owned_session_closed_on_exit():
+    async with serve({"/currencyoverview": overview}) as url:
+        async with EconomyApi(NinjaConfig(base_url=url)) as api:
+            assert isinstance(await api.get_currency(), SuccessResponse)
+            session = api.session
+        assert session.closed
+
+
+@mark.asyncio
+async def test_shared_session():
+    cfg = NinjaConfig(connection_limit=4, connection_limit_per_host=2)
+    async with serve({"/currencyoverview": overview}) as url:
+        cfg.base_url = url
+        async with create_session(cfg) as session:
+            async with EconomyApi(cfg, session) as economy:
+                async with BuildsApi(cfg, session) as builds:
+                    assert economy.session is builds.session is session
+                    assert session.connector.limit == 4
+                    assert session.connector.limit_per_host == 2
+                    assert isinstance(await economy.get_currency(), SuccessResponse)
+            assert not session.closed
+
+
+@mark.asyncio
+async def test_http_cache_revalidates(tmp_path):
+    statuses = []
+
+    async def etag_overview(request: web.Request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            statuses.append(304)
+            return web.Response(status=304)
+        statuses.append(200)
+        return web.json_response(
+            {"lines": [{"detailsId": "chaos-orb"}], "language": {"name": "en"}},
+            headers={"ETag": '"v1"'},
+        )
+
+    async with serve({"/currencyoverview": etag_overview}) as url:
+        cfg = NinjaConfig(base_url=url, http_cache_dir=str(tmp_path))
+        async with EconomyApi(cfg) as api:
+            first = await api.get_currency()
+            second = await api.get_currency()
+        # a fresh client decodes the stored body instead of downloading it again
+        async with EconomyApi(cfg) as api:
+            third = await api.get_currency()
+
+    assert statuses == [200, 304, 304]
+    assert second.data == first.data
+    assert third.data == first.data
+
+    # an expired memory cache entry answers the 304 without decoding again
+    async with serve({"/currencyoverview": etag_overview}) as url:
+        cfg.base_url = url
+        cfg.cache_max_entries = 8
+        cfg.cache_ttls = {"/currencyoverview": 0.01}
+        async with EconomyApi(cfg) as api:
+            first = await api.get_currency()
+            await asyncio.sleep(0.02)
+            second = await api.get_currency()
+    assert statuses[-2:] == [200, 304]
+    assert second.data is first.data
+
+
+@mark.asyncio
+async def test_coalesces_identical_requests():
+    calls = 0
+
+    async def slow_overview(request: web.Request):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        if request.query["type"] == "Fragment":
+            return web.Response(status=500)
+        return web.json_response({"lines": [], "language": {"name": "en"}})
+
+    async with serve({"/currencyoverview": slow_overview}) as url:
+        cfg = NinjaConfig(base_url=url, raise_errors=True)
+        async with EconomyApi(cfg) as api:
+            cancelled = asyncio.ensure_future(api.get_currency())
+            waiters = [api.get_currency() for _ in range(9)]
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+            results = await asyncio.gather(*waiters)
+            assert calls == 1
+            assert all(r is results[0] for r in results)
+
+            errors = await asyncio.gather(
+                *(api.get_fragments() for _ in range(3)), return_exceptions=True
+            )
+            assert calls == 2
+            assert all(isinstance(e, Exception) for e in errors)
+
+
+@mark.asyncio
+async def test_custom_json_decoder(capsys):
+    bodies = []
+
+    def decoder(body: bytes):
+        bodies.append(body)
+        return json.loads(body)
+
+    async with serve({"/currencyoverview": overview}) as url:
+        cfg = NinjaConfig(base_url=url, verbose=True, json_decoder=decoder)
+        async with EconomyApi(cfg) as api:
+            res = await api.get_currency()
+
+    assert isinstance(res, SuccessResponse)
+    assert len(bodies) == 1
+    assert f"Text = {bodies[0].decode()}" in capsys.readouterr().out
+
+
+@mark.asyncio
+async def test_decode_offload():
+    loop_thread = threading.get_ident()
+    decode_threads = []
+
+    def decoder(body: bytes):
+        decode_threads.append(threading.get_ident())
+        return json.loads(body)
+
+    async with serve({"/currencyoverview": overview}) as url:
+        with ThreadPoolExecutor(1) as executor:
+            cfg = NinjaConfig(
+                base_url=url,
+                json_decoder=decoder,
+                decode_executor=executor,
+                decode_offload_bytes=1,
+                coalesce_requests=False,
+            )
+            async with EconomyApi(cfg) as api:
+                await api.get_currency()
+                cfg.decode_offload_bytes = 1 << 20
+                await api.get_currency()
+
+    assert decode_threads[0] != loop_thread
+    assert decode_threads[1] == loop_thread
@@ -0,0 +1,103 @@
+import pickle
+import tracemalloc
+
+from aiohttp import web
+from pytest import mark
+
+from ninjaclient import EconomyApi, NinjaConfig
+from ninjaclient.compact import CompactCurrencyLine, CompactItemLine
+
+from . import serve
+
+
+def item_line(i: int) -> dict:
+    return {
+        "id": i,
+        "name": f"Item {i}",
+        "icon": f"https://web.poecdn.com/image/item{i}.png",
+        "itemClass": 3,
+        "sparkline": {"data": [0, 1.5, 2.0, None, 3.1, 4.0], "totalChange": 4.0},
+        "lowConfidenceSparkLine": {"data": [0, 1.5, 2.0], "totalChange": 2.0},
+        "implicitModifiers": [{"text": "+10 to maximum Life", "optional": False}],
+        "explicitModifiers": [
+            {"text": f"{j}% increased Damage", "optional": False} for j in range(4)
+        ],
+        "flavourText": "A long forgotten relic.",
+        "chaosValue": 12.5 + i,
+        "exaltedValue": 0.1,
+        "divineValue": 0.05,
+        "count": 20,
+        "detailsId": f"item-{i}",
+        "listingCount": 150,
+    }
+
+
+def currency_line(i: int) -> dict:
+    def transaction(pay: int, get: int):
+        return {
+            "id": 0,
+            "league_id": 1,
+            "pay_currency_id": pay,
+            "get_currency_id": get,
+            "sample_time_utc": "2023-05-01T00:00:00Z",
+            "count": 10,
+            "value": 2.5,
+            "data_point_count": 1,
+            "includes_secondary": False,
+            "listing_count": 40,
+        }
+
+    return {
+        "currencyTypeName": f"Currency {i}",
+        "pay": transaction(i, 1),
+        "receive": transaction(1, i),
+        "paySparkLine": {"data": [0, 1], "totalChange": 1},
+        "receiveSparkLine": {"data": [0, 2], "totalChange": 2},
+        "chaosEquivalent": 3.5,
+        "lowConfidencePaySparkLine": {"data": [0, 1], "totalChange": 1},
+        "lowConfidenceReceiveSparkLine": {"data": [0, 2], "totalChange": 2},
+        "detailsId": f"currency-{i}",
+    }
+
+
+def test_dict_compatible():
+    line = item_line(1)
+    compact = CompactItemLine(line)
+    assert compact == line
+    assert compact["chaosValue"] == 13.5
+    assert compact["sparkline"]["data"] == line["sparkline"]["data"]
+    assert compact["explicitModifiers"] == line["explicitModifiers"]
+    assert compact.get("mapTier") is None and "mapTier" not in compact
+    assert compact.to_dict() == line
+    assert pickle.loads(pickle.dumps(compact)) == line
+
+    line = currency_line(2)
+    compact = CompactCurrencyLine(line)
+    assert compact == line and compact["pay"]["pay_currency_id"] == 2
+
+
+def test_smaller_than_dicts():
+    def traced_size(build):
+        tracemalloc.start()
+        lines = build()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size
+
+    raw = [item_line(i) for i in range(500)]
+    dicts = traced_size(lambda: [item_line(i) for i in range(500)])
+    compact = traced_size(lambda: [CompactItemLine(line) for line in raw])
+    assert compact < dicts / 2
+
+
+@mark.asyncio
+async def test_compact_lines_option():
+    async def overview(request: web.Request):
+        return web.json_response({"lines": [item_line(0)], "language": {"name": "en"}})
+
+    async with serve({"/itemoverview": overview}) as url:
+        async with EconomyApi(NinjaConfig(base_url=url, compact_lines=True)) as api:
+            res = await api.get_oils()
+
+    assert isinstance(res.data["lines"][0], CompactItemLine)
+    assert res.data["lines"] == [item_line(0)]
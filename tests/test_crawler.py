@@ -0,0 +1,108 @@
+import asyncio
+
+from aiohttp import web
+from pytest import mark
+
+from ninjaclient import BuildsApi, NinjaConfig
+
+from . import fake_builds_response, serve
+
+
+def character_route(fail: set[str], in_flight: list[int]):
+    async def character(request: web.Request):
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight[1], in_flight[0])
+        await asyncio.sleep(0.005)
+        in_flight[0] -= 1
+        if request.query["name"] in fail:
+            return web.Response(status=500)
+        return web.json_response(
+            {"account": request.query["account"], "name": request.query["name"]}
+        )
+
+    return character
+
+
+@mark.asyncio
+async def test_crawl_with_checkpoint(tmp_path):
+    ladder = fake_builds_response(users=40)
+    checkpoint = tmp_path / "crawl.jsonl"
+    in_flight = [0, 0]
+    progress = []
+
+    async with serve(
+        {"/0/getcharacter": character_route({"char3", "char7"}, in_flight)}
+    ) as url:
+        async with BuildsApi(NinjaConfig(base_url=url)) as api:
+            first = [
+                c["name"]
+                async for c in api.crawl_characters(
+                    ladder,
+                    concurrency=3,
+                    checkpoint=checkpoint,
+                    on_progress=progress.append,
+                )
+            ]
+            assert in_flight[1] == 3
+            assert len(first) == 38
+            assert progress[-1].failed == 2 and progress[-1].remaining == 0
+            assert set(progress[-1].errors) == {
+                ("account3", "char3"),
+                ("account7", "char7"),
+            }
+
+        # resuming only fetches the characters that failed
+        progress.clear()
+        async with serve({"/0/getcharacter": character_route(set(), in_flight)}) as url:
+            async with BuildsApi(NinjaConfig(base_url=url)) as api:
+                resumed = [
+                    c["name"]
+                    async for c in api.crawl_characters(
+                        ladder, checkpoint=checkpoint, on_progress=progress.append
+                    )
+                ]
+    assert sorted(resumed) == ["char3", "char7"]
+    # the skipped characters are reported before anything is fetched
+    assert len(progress) == 3 and progress[0].skipped == 38
+
+
+@mark.asyncio
+async def test_crawl_waits_for_the_consumer():
+    pairs = [(f"account{i}", f"char{i}") for i in range(40)]
+    fetched = [0, 0]
+    async with serve({"/0/getcharacter": character_route(set(), fetched)}) as url:
+        async with BuildsApi(NinjaConfig(base_url=url)) as api:
+            progress = []
+            crawl = api.crawl_characters(
+                pairs, concurrency=2, on_progress=progress.append
+            )
+            await anext(crawl)
+            await asyncio.sleep(0.1)
+            # the queue holds two characters and each worker holds one more
+            assert len(progress) <= 5
+            assert len([c async for c in crawl]) == 39
+
+
+@mark.asyncio
+async def test_crawl_stops_early(tmp_path):
+    pairs = [(f"account{i}", f"char{i}") for i in range(20)]
+    checkpoint = tmp_path / "crawl.jsonl"
+    async with serve({"/0/getcharacter": character_route(set(), [0, 0])}) as url:
+        async with BuildsApi(NinjaConfig(base_url=url)) as api:
+            crawl = api.crawl_characters(
+                pairs, concurrency=4, rate=200, checkpoint=checkpoint
+            )
+            first = []
+            async for c in crawl:
+                first.append(c["name"])
+                break
+            await crawl.aclose()
+
+            # characters fetched but not delivered are fetched again
+            rest = [
+                c["name"]
+                async for c in api.crawl_characters(
+                    pairs, concurrency=4, checkpoint=checkpoint
+                )
+            ]
+    assert sorted(first + rest) == sorted(name for _, name in pairs)
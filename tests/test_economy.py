@@ -1,12 +1,15 @@
-from typing import Type
+import asyncio
+from typing import Type, get_args
 
-from pytest import fixture, mark
+from aiohttp import web
+from pytest import fixture, mark, raises
 
-from apiclient import ErrorResponse, SuccessResponse
+from apiclient import ErrorResponse, PartialResultError, SuccessResponse
 from ninjaclient import EconomyApi, NinjaConfig
+from ninjaclient.client import CurrencyOverviewType, ItemOverviewType
 from ninjaclient.models import *
 
-from . import has_all_keys
+from . import has_all_keys, serve
 
 
 @fixture()
@@ -66,3 +69,40 @@ test_get_enchs = build_test("get_helmet_enchants")
 test_get_beasts = build_test("get_beasts")
 test_get_ess = build_test("get_essences")
 test_get_vials = build_test("get_vials")
+
+
+@mark.asyncio
+async def test_get_snapshot():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def overview(request: web.Request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if request.query["type"] == "Vial":
+            return web.Response(status=500)
+        return web.json_response({"lines": [], "language": {"name": "en"}})
+
+    async with serve({"/currencyoverview": overview, "/itemoverview": overview}) as url:
+        async with EconomyApi(NinjaConfig(base_url=url)) as api:
+            snapshot = await api.get_snapshot(concurrency=4)
+
+    assert set(snapshot.currencies) == set(get_args(CurrencyOverviewType))
+    assert set(snapshot.items) == set(get_args(ItemOverviewType)) - {"Vial"}
+    assert list(snapshot.errors) == ["Vial"]
+    assert isinstance(snapshot.errors["Vial"], ErrorResponse)
+    assert max_in_flight == 4
+
+    # with raise_errors the other categories still complete
+    async with serve({"/currencyoverview": overview, "/itemoverview": overview}) as url:
+        async with EconomyApi(NinjaConfig(base_url=url, raise_errors=True)) as api:
+            with raises(PartialResultError) as e:
+                await api.get_snapshot()
+
+    assert list(e.value.exceptions) == ["Vial"]
+    snapshot = e.value.result
+    assert set(snapshot.items) == set(get_args(ItemOverviewType)) - {"Vial"}
+    assert list(snapshot.errors) == ["Vial"]
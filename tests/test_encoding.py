@@ -0,0 +1,134 @@
+import json
+
+from aiohttp import web
+from pytest import mark, raises
+
+from apiclient import (
+    CompressedBody,
+    RateLimiter,
+    RetryPolicy,
+    SuccessResponse,
+    compress,
+    decompress,
+)
+from ninjaclient import BuildsApi, NinjaConfig
+
+from . import fake_builds_response, serve
+
+LADDER = fake_builds_response(users=500)
+
+
+async def builds(request: web.Request):
+    res = web.json_response(LADDER, headers={"ETag": '"v1"'})
+    if request.headers.get("If-None-Match") == '"v1"':
+        return web.Response(status=304, headers={"ETag": '"v1"'})
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        res.enable_compression(web.ContentCoding.gzip)
+    return res
+
+
+def test_round_trip():
+    body = json.dumps(LADDER).encode()
+    for encoding in ("gzip", "deflate"):
+        assert decompress(compress(body, encoding), encoding) == body
+    assert decompress(body, None) == body
+    with raises(ValueError):
+        decompress(body, "lzma")
+
+
+def test_header_forms():
+    body = json.dumps(LADDER).encode()
+    gzipped = compress(body, "gzip")
+    assert decompress(gzipped, "GZIP") == body
+    assert decompress(gzipped, "x-gzip") == body
+    assert decompress(gzipped, " Gzip , identity") == body
+    # codings are listed in the order they were applied
+    stacked = compress(compress(body, "deflate"), "gzip")
+    assert decompress(stacked, "deflate, gzip") == body
+    with raises(ValueError):
+        decompress(stacked, "gzip, lzma")
+
+
+@mark.asyncio
+async def test_stacked_encoding_from_server():
+    body = json.dumps(LADDER).encode()
+
+    async def overview(request: web.Request):
+        return web.Response(
+            body=compress(compress(body, "deflate"), "gzip"),
+            headers={"Content-Encoding": "X-Deflate, GZIP"},
+            content_type="application/json",
+        )
+
+    async with serve({"/0/getbuildoverview": overview}) as url:
+        async with BuildsApi(NinjaConfig(base_url=url)) as api:
+            assert (await api.get_experience_ladder()).data == LADDER
+
+
+@mark.asyncio
+async def test_wire_bytes_and_compressed_cache(tmp_path):
+    cfg = NinjaConfig(
+        cache_max_entries=8,
+        cache_compression="gzip",
+        http_cache_dir=str(tmp_path),
+    )
+    async with serve({"/0/getbuildoverview": builds}) as url:
+        cfg.base_url = url
+        async with BuildsApi(cfg) as api:
+            res = await api.get_experience_ladder()
+            assert res == SuccessResponse(LADDER)
+            stats = api.transfer_stats
+            assert stats.responses == 1 and stats.ratio > 2
+            assert stats.decoded_bytes == len(json.dumps(LADDER).encode())
+
+            # the memory cache holds the gzip body as received
+            [entry] = api.cache._items.values()
+            assert isinstance(entry.value, CompressedBody)
+            assert api.cache.size == stats.wire_bytes
+            assert await api.get_experience_ladder() == res
+
+            # the disk cache stores it compressed as well
+            api.cache.clear()
+            assert (await api.get_experience_ladder()).data == LADDER
+        async with BuildsApi(cfg) as api:
+            revalidated = await api.get_experience_ladder()
+            assert revalidated.data == LADDER
+            assert api.transfer_stats.wire_bytes == 0
+
+        # without negotiation the body arrives uncompressed
+        async with BuildsApi(NinjaConfig(base_url=url, accept_encodings=[])) as api:
+            assert (await api.get_experience_ladder()).data == LADDER
+            assert api.transfer_stats.ratio == 1
+
+
+@mark.asyncio
+async def test_streamed_compressed_error_is_retried():
+    statuses = [429, 200]
+
+    async def overview(request: web.Request):
+        status = statuses.pop(0)
+        res = web.json_response(
+            {"error": "slow down"} if status == 429 else LADDER,
+            status=status,
+            headers={"Retry-After": "0"} if status == 429 else None,
+        )
+        res.enable_compression(web.ContentCoding.gzip)
+        return res
+
+    async with serve({"/0/getbuildoverview": overview}) as url:
+        cfg = NinjaConfig(
+            base_url=url,
+            rate_limiter=RateLimiter(rate=100, burst=5),
+            retry=RetryPolicy(base_delay=0.01),
+        )
+        async with BuildsApi(cfg) as api:
+            res = await api.get_experience_ladder(stream=True)
+            stats = api.throttle_stats
+
+    assert isinstance(res, SuccessResponse)
+    assert (stats.attempts, stats.throttled) == (2, 1)
+
+
+def test_unsupported_encoding():
+    with raises(ValueError):
+        BuildsApi(NinjaConfig(accept_encodings=["lzma"]))
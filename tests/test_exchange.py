@@ -0,0 +1,110 @@
+import math
+
+from pytest import approx
+
+from ninjaclient import ExchangeGraph
+
+CHAOS, DIVINE, EXALT, VAAL = 1, 2, 3, 4
+
+
+def transaction(pay: int, get: int, value: float, listings: int = 100):
+    return {
+        "pay_currency_id": pay,
+        "get_currency_id": get,
+        "value": value,
+        "listing_count": listings,
+        "data_point_count": 10,
+    }
+
+
+def response(lines):
+    return {
+        "lines": lines,
+        "currencyDetails": [
+            {"id": CHAOS, "name": "Chaos Orb"},
+            {"id": DIVINE, "name": "Divine Orb"},
+            {"id": EXALT, "name": "Exalted Orb"},
+            {"id": VAAL, "name": "Vaal Orb"},
+        ],
+    }
+
+
+def test_multi_hop_rates():
+    res = response(
+        [
+            # 1 divine sells for 200 chaos, buying one costs 210 chaos
+            {
+                "pay": transaction(DIVINE, CHAOS, 1 / 200),
+                "receive": transaction(CHAOS, DIVINE, 210),
+            },
+            {
+                "pay": transaction(EXALT, CHAOS, 1 / 20),
+                "receive": transaction(CHAOS, EXALT, 22, listings=5),
+            },
+            {"pay": None, "receive": transaction(CHAOS, VAAL, 1)},
+        ]
+    )
+    graph = ExchangeGraph(res)
+    assert graph.rate("Divine Orb", "Chaos Orb") == approx(200)
+    assert graph.rate("Divine Orb", "Exalted Orb") == approx(200 / 22)
+    assert graph.path("Divine Orb", "Exalted Orb") == [
+        "Divine Orb",
+        "Chaos Orb",
+        "Exalted Orb",
+    ]
+    assert graph.rate(DIVINE, VAAL) == approx(200)
+    assert graph.rate("Vaal Orb", "Chaos Orb") == 0
+    assert graph.path("Vaal Orb", "Chaos Orb") == []
+    assert graph.arbitrage() == []
+
+    thin = ExchangeGraph(res, min_listings=10)
+    assert thin.rate("Chaos Orb", "Exalted Orb") == 0
+    weighted = ExchangeGraph(res, confident_listings=10)
+    assert weighted.rate("Chaos Orb", "Exalted Orb") == approx(0.5 / 22)
+
+
+def test_arbitrage():
+    res = response(
+        [
+            {
+                "pay": transaction(DIVINE, CHAOS, 1 / 200),
+                "receive": transaction(CHAOS, DIVINE, 210),
+            },
+            {
+                "pay": transaction(EXALT, CHAOS, 1 / 20),
+                "receive": transaction(CHAOS, EXALT, 22),
+            },
+            # someone sells exalts for divines far too cheap
+            {"receive": transaction(DIVINE, EXALT, 1 / 12)},
+        ]
+    )
+    graph = ExchangeGraph(res)
+    [(gain, cycle)] = graph.arbitrage()
+    assert gain == approx(12 * 20 / 210)
+    assert cycle == ["Chaos Orb", "Divine Orb", "Exalted Orb", "Chaos Orb"]
+
+    # going round the cycle more often always buys more, so rates through it
+    # are unbounded and have no best chain
+    assert graph.rate("Divine Orb", "Exalted Orb") == math.inf
+    assert graph.path("Divine Orb", "Exalted Orb") == []
+
+
+def test_rates_outside_a_gain_cycle():
+    res = response(
+        [
+            {
+                "pay": transaction(DIVINE, CHAOS, 1 / 200),
+                "receive": transaction(CHAOS, DIVINE, 210),
+            },
+            {"receive": transaction(DIVINE, EXALT, 1 / 12)},
+            {"pay": transaction(EXALT, CHAOS, 1 / 20)},
+            # vaal orbs sell into the cycle but nothing buys them
+            {"pay": transaction(VAAL, CHAOS, 1)},
+        ]
+    )
+    graph = ExchangeGraph(res)
+    assert len(graph.arbitrage()) == 1
+    assert graph.rate("Vaal Orb", "Divine Orb") == math.inf
+    assert graph.rate("Chaos Orb", "Vaal Orb") == 0
+    assert graph.rate("Vaal Orb", "Vaal Orb") == 1
+    assert graph.path("Vaal Orb", "Vaal Orb") == ["Vaal Orb"]
@@ -0,0 +1,75 @@
+from aiohttp import web
+from pytest import mark
+
+from ninjaclient import EconomyApi, EconomyChangeFeed, NinjaConfig
+
+from . import serve
+
+
+def oils(**prices: float) -> dict:
+    return {
+        "lines": [
+            {"detailsId": d, "name": d, "chaosValue": c, "divineValue": c / 200}
+            for d, c in prices.items()
+        ]
+    }
+
+
+def test_diff_thresholds():
+    feed = EconomyChangeFeed(
+        EconomyApi(NinjaConfig()), ["Oil"], min_chaos_change=1, min_relative_change=0.1
+    )
+    first = feed.diff("Oil", oils(golden=100, amber=5, clear=1))
+    assert [l["detailsId"] for l in first.added] == ["golden", "amber", "clear"]
+
+    # below both thresholds, nothing is reported
+    assert not feed.diff("Oil", oils(golden=105, amber=5.5, clear=1))
+
+    # the drift from the last reported price adds up
+    changes = feed.diff("Oil", oils(golden=111, amber=5, sepia=2))
+    assert [
+        (c.details_id, c.chaos_before, c.chaos_after) for c in changes.repriced
+    ] == [("golden", 100, 111)]
+    assert [l["detailsId"] for l in changes.added] == ["sepia"]
+    assert changes.removed == ["clear"]
+    assert len(changes) == 3
+
+    # divine value changes are reported on their own threshold
+    feed = EconomyChangeFeed(
+        EconomyApi(NinjaConfig()),
+        ["Oil"],
+        min_chaos_change=1000,
+        min_divine_change=0.01,
+        emit_initial=False,
+    )
+    assert not feed.diff("Oil", oils(golden=100))
+    [change] = feed.diff("Oil", oils(golden=110)).repriced
+    assert (change.divine_before, change.divine_after) == (0.5, 0.55)
+
+
+@mark.asyncio
+@mark.parametrize("raise_errors", [False, True])
+async def test_feed_iterator(raise_errors):
+    ticks = [oils(golden=100), oils(golden=100), oils(golden=150), oils()]
+
+    async def overview(request: web.Request):
+        if request.query["type"] == "Incubator":
+            return web.Response(status=500)
+        return web.json_response(ticks.pop(0) if len(ticks) > 1 else ticks[0])
+
+    async with serve({"/itemoverview": overview}) as url:
+        cfg = NinjaConfig(base_url=url, cache_max_entries=8, raise_errors=raise_errors)
+        async with EconomyApi(cfg) as api:
+            feed = EconomyChangeFeed(api, ["Oil", "Incubator"], interval=0.01)
+            received = []
+            async for changes in feed:
+                received.append(changes)
+                if len(received) == 3:
+                    break
+
+    added, repriced, removed = received
+    assert [c.category for c in received] == ["Oil"] * 3
+    assert len(added.added) == 1
+    assert repriced.repriced[0].chaos_after == 150
+    assert removed.removed == ["golden"]
+    assert set(feed.errors) == {"Incubator"}
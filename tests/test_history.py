@@ -0,0 +1,82 @@
+from aiohttp import web
+from pytest import mark, raises
+
+from apiclient import PartialResultError
+from ninjaclient import BuildsApi, Ladder, LadderHistory, NinjaConfig
+
+from . import fake_builds_response, serve
+
+
+def shifted_ladder(seed: int, first_user: int, users: int = 100) -> dict:
+    """A ladder whose characters are char{first_user}..char{first_user + users}."""
+    res = fake_builds_response(users=users, seed=seed)
+    res["names"] = [f"char{first_user + i}" for i in range(users)]
+    res["accounts"] = [f"account{first_user + i}" for i in range(users)]
+    return res
+
+
+def test_align_and_deltas():
+    old, new = shifted_ladder(1, 0), shifted_ladder(2, 50)
+    history = LadderHistory.align(
+        ["week-2", "week-1"], [Ladder.from_response(old), Ladder.from_response(new)]
+    )
+
+    assert len(history) == 150
+    c = history.index("account60", "char60")
+    assert history.column("week-2", "levels")[c] == old["levels"][60]
+    assert history.column("week-1", "levels")[c] == new["levels"][10]
+    assert history.column(0, "levels")[history.index("account120", "char120")] == -1
+
+    deltas = history.deltas("levels")
+    assert len(deltas) == 50
+    assert deltas[("account60", "char60")] == new["levels"][10] - old["levels"][60]
+
+    classes = history.classes("week-1")
+    assert classes[0] is None
+    assert classes[c] == new["classNames"][new["classes"][10]]
+
+
+def test_adoption():
+    old, new = shifted_ladder(1, 0), shifted_ladder(2, 50)
+    ladders = [Ladder.from_response(old), Ladder.from_response(new)]
+    history = LadderHistory.align(["week-2", "week-1"], ladders)
+
+    adoption = history.adoption("keystone")
+    for s, ladder in enumerate(ladders):
+        for label, count in zip(ladder.keystones.labels, ladder.keystones.counts()):
+            assert adoption[label][s] == count
+
+    started, stopped = history.adopters("unique", "Unique 0")
+    before = history.users_of("unique", "Unique 0", "week-2")
+    after = history.users_of("unique", "Unique 0", "week-1")
+    assert started == after - before and stopped == before - after
+
+
+@mark.asyncio
+async def test_get_ladder_history():
+    ladders = {"week-1": shifted_ladder(1, 0), "week-2": shifted_ladder(2, 10)}
+
+    async def overview(request: web.Request):
+        tm = request.query["timemachine"]
+        if tm not in ladders:
+            return web.Response(status=404)
+        return web.json_response(ladders[tm])
+
+    async with serve({"/0/getbuildoverview": overview}) as url:
+        async with BuildsApi(NinjaConfig(base_url=url)) as api:
+            history, errors = await api.get_ladder_history(
+                ["week-2", "week-1", "week-3"], stream=True
+            )
+
+    assert history.snapshots == ["week-2", "week-1"]
+    assert list(errors) == ["week-3"]
+    assert len(history) == 110
+
+    async with serve({"/0/getbuildoverview": overview}) as url:
+        async with BuildsApi(NinjaConfig(base_url=url, raise_errors=True)) as api:
+            with raises(PartialResultError) as e:
+                await api.get_ladder_history(["week-2", "week-1", "week-3"])
+
+    history, errors = e.value.result
+    assert history.snapshots == ["week-2", "week-1"]
+    assert list(errors) == list(e.value.exceptions) == ["week-3"]
@@ -0,0 +1,42 @@
+import json
+from itertools import accumulate
+
+from ninjaclient import Ladder
+from ninjaclient.streaming import BuildsStreamParser
+
+from . import fake_builds_response
+
+
+def naive_decode(use: dict[str, list[int]], labels: int) -> list[list[int]]:
+    return [list(accumulate(use.get(str(i), []))) for i in range(labels)]
+
+
+def test_from_response():
+    res = fake_builds_response()
+    ladder = Ladder.from_response(res)
+
+    assert len(ladder) == len(res["names"])
+    assert ladder.levels.tolist() == res["levels"]
+    assert ladder.energy_shield.tolist() == res["energyShield"]
+    for index, key in [
+        (ladder.unique_items, "uniqueItemUse"),
+        (ladder.keystones, "keystoneUse"),
+        (ladder.masteries, "masteryUse"),
+    ]:
+        expected = naive_decode(res[key], len(index))
+        assert [index.users(i).tolist() for i in range(len(index))] == expected
+        assert index.counts().tolist() == [len(users) for users in expected]
+
+    detail = res["skillDetails"][1]
+    gems = ladder.support_gems[detail["name"]]
+    assert (
+        gems.users_of("Support 2").tolist()
+        == naive_decode(detail["supportGems"]["use"], 3)[2]
+    )
+
+
+def test_from_streamed_response():
+    res = fake_builds_response()
+    parser = BuildsStreamParser()
+    parser.feed(json.dumps(res).encode())
+    assert Ladder.from_response(parser.close()) == Ladder.from_response(res)
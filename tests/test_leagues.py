@@ -0,0 +1,83 @@
+from aiohttp import web
+from pytest import mark, raises
+
+from apiclient import PartialResultError
+from ninjaclient import BuildsApi, EconomyApi, Ladder, NinjaConfig
+
+from . import fake_builds_response, serve
+
+PRICES = {
+    "Sanctum": {"golden-oil": 10, "amber-oil": 1},
+    "Standard": {"golden-oil": 4, "clear-oil": 0.5},
+}
+
+
+async def overview(request: web.Request):
+    prices = PRICES.get(request.query["league"])
+    if prices is None:
+        return web.Response(status=404)
+    return web.json_response(
+        {
+            "lines": [
+                {"detailsId": d, "name": d, "chaosValue": c} for d, c in prices.items()
+            ]
+        }
+    )
+
+
+async def builds(request: web.Request):
+    seed = {"sanctum": 0, "standard": 1}.get(request.query["overview"])
+    if seed is None:
+        return web.Response(status=404)
+    return web.json_response(fake_builds_response(users=30, seed=seed))
+
+
+@mark.asyncio
+async def test_economy_across_leagues():
+    async with serve({"/itemoverview": overview}) as url:
+        async with EconomyApi(NinjaConfig(base_url=url, league="Sanctum")) as api:
+            standard = await api.get_oils(league="Standard")
+            assert [l["detailsId"] for l in standard.data["lines"]] == [
+                "golden-oil",
+                "clear-oil",
+            ]
+
+            table = await api.get_across_leagues(
+                "Oil", ["Sanctum", "Standard", "Missing"]
+            )
+
+    assert list(table) == ["golden-oil", "amber-oil", "clear-oil"]
+    assert table.values("chaosValue") == {
+        "golden-oil": [10, 4, None],
+        "amber-oil": [1, None, None],
+        "clear-oil": [None, 0.5, None],
+    }
+    assert set(table.errors) == {"Missing"}
+    assert list(table.column("Standard")) == ["golden-oil", "clear-oil"]
+
+
+@mark.asyncio
+async def test_ladders_across_leagues():
+    async with serve({"/0/getbuildoverview": builds}) as url:
+        async with BuildsApi(NinjaConfig(base_url=url)) as api:
+            table = await api.get_across_leagues(["Sanctum", "Standard", "Missing"])
+
+    assert set(table.errors) == {"Missing"}
+    assert list(table) == ["Juggernaut", "Necromancer", "Deadeye"]
+    for i, seed in enumerate([0, 1]):
+        ladder = Ladder.from_response(fake_builds_response(users=30, seed=seed))
+        assert sum(row[i] for row in table.rows.values()) == 30
+        assert table["Deadeye"][i] == list(ladder.classes).count(2)
+    assert all(row[2] is None for row in table.rows.values())
+
+
+@mark.asyncio
+async def test_across_leagues_raise_errors():
+    async with serve({"/itemoverview": overview}) as url:
+        cfg = NinjaConfig(base_url=url, raise_errors=True)
+        async with EconomyApi(cfg) as api:
+            with raises(PartialResultError) as e:
+                await api.get_across_leagues("Oil", ["Sanctum", "Missing"])
+
+    assert list(e.value.exceptions) == ["Missing"]
+    assert e.value.result.values("chaosValue")["golden-oil"] == [10, None]
@@ -0,0 +1,56 @@
+from aiohttp import web
+from pytest import mark
+
+from apiclient import Histogram, Metrics
+from ninjaclient import EconomyApi, NinjaConfig
+
+from . import serve
+
+
+def test_histogram():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1.0
+    assert histogram.quantile(1) == float("inf")
+
+
+@mark.asyncio
+async def test_client_metrics():
+    async def overview(request: web.Request):
+        if request.query["type"] == "Fragment":
+            return web.Response(status=503)
+        return web.json_response({"lines": [], "language": {"name": "en"}})
+
+    timings = []
+    metrics = Metrics(on_request=timings.append)
+    cfg = NinjaConfig(cache_max_entries=8, metrics=metrics)
+    async with serve({"/currencyoverview": overview}) as url:
+        cfg.base_url = url
+        async with EconomyApi(cfg) as api:
+            await api.get_currency()
+            await api.get_currency()
+            await api.get_fragments()
+
+    first, hit, error = timings
+    assert first.status == 200 and first.bytes > 0 and first.error is None
+    assert {"connect", "ttfb", "body", "decode", "model", "total"} <= set(first.phases)
+    assert hit.cache == "memory" and set(hit.phases) == {"total"}
+    assert error.status == 503 and error.error
+
+    stats = metrics.paths["/currencyoverview"]
+    assert (stats.requests, stats.errors, stats.memory_cache_hits) == (3, 1, 1)
+    assert stats.status_counts == {200: 1, 503: 1}
+    assert stats.phases["total"].count == 3
+
+    text = metrics.to_prometheus()
+    assert (
+        'apiclient_request_phase_seconds_count{path="/currencyoverview",phase="total"} 3'
+        in text
+    )
+    assert (
+        'apiclient_cache_hits_total{path="/currencyoverview",cache="memory"} 1' in text
+    )
+    assert 'apiclient_responses_total{path="/currencyoverview",status="503"} 1' in text
@@ -0,0 +1,105 @@
+from ninjaclient import EconomySnapshot, PriceIndex
+from ninjaclient.compact import CompactItemResponse
+
+
+def item(name: str, details_id: str, chaos: float, listings: int = 10, **extra):
+    return {
+        "name": name,
+        "detailsId": details_id,
+        "chaosValue": chaos,
+        "divineValue": chaos / 200,
+        "listingCount": listings,
+        **extra,
+    }
+
+
+def snapshot(compact: bool = False) -> EconomySnapshot:
+    uniques = {
+        "lines": [
+            item("Tabula Rasa", "tabula-rasa", 10, baseType="Simple Robe"),
+            item("Tabula Rasa", "tabula-rasa-6l", 15, links=6, baseType="Simple Robe"),
+            item(
+                "Kaom's Heart", "kaoms-heart", 50, listings=3, baseType="Glorious Plate"
+            ),
+        ]
+    }
+    gems = {
+        "lines": [
+            item("Enlighten Support", "enlighten-support-4", 900, gemLevel=4),
+            item("Enlighten Support", "enlighten-support-3", 300, gemLevel=3),
+            item("Enlighten Support", "enlighten-support-1", 5, gemLevel=1),
+            item(
+                "Enlighten Support",
+                "enlighten-support-4c",
+                700,
+                gemLevel=4,
+                corrupted=True,
+            ),
+        ]
+    }
+    currency = {
+        "lines": [
+            {
+                "currencyTypeName": "Divine Orb",
+                "detailsId": "divine-orb",
+                "chaosEquivalent": 200,
+                "receive": {"listing_count": 900},
+            },
+            {
+                "currencyTypeName": "Exalted Orb",
+                "detailsId": "exalted-orb",
+                "chaosEquivalent": 20,
+            },
+        ]
+    }
+    fragments = {
+        "lines": [
+            {
+                "currencyTypeName": "Sacrifice at Dusk",
+                "detailsId": "sacrifice-at-dusk",
+                "chaosEquivalent": 2,
+            }
+        ]
+    }
+    wrap = CompactItemResponse if compact else dict
+    return EconomySnapshot(
+        currencies={"Currency": currency, "Fragment": fragments},
+        items={"UniqueArmour": wrap(uniques), "SkillGem": wrap(gems)},
+    )
+
+
+def test_lookups():
+    for compact in (False, True):
+        index = PriceIndex.from_snapshot(snapshot(compact))
+        assert len(index) == 10
+        assert index.lookup("tabula rasa").details_id == "tabula-rasa"
+        assert index.lookup("Tabula Rasa", links=6).chaos_value == 15
+        assert index.lookup("Tabula Rasa", links=5) is None
+        assert index.lookup("Enlighten Support", gem_level=4).chaos_value == 900
+        assert (
+            index.lookup("Enlighten Support", gem_level=4, corrupted=True).chaos_value
+            == 700
+        )
+        assert index.by_details_id("exalted-orb").divine_value == 0.1
+        # priced with the Divine Orb rate of the Currency category
+        assert index.by_details_id("sacrifice-at-dusk").divine_value == 0.01
+        assert index.by_details_id("divine-orb").listing_count == 900
+        assert [r.name for r in index.by_base_type("simple robe")] == [
+            "Tabula Rasa"
+        ] * 2
+        assert index.lookup("Divine Orb").category == "Currency"
+
+
+def test_lookup_many():
+    index = PriceIndex.from_snapshot(snapshot())
+    records = index.lookup_many(["Kaom's Heart", "Mirror of Kalandra", "Exalted Orb"])
+    assert [r and r.details_id for r in records] == ["kaoms-heart", None, "exalted-orb"]
+    assert [
+        r.chaos_value
+        for r in index.lookup_items(
+            [
+                {"name": "Tabula Rasa", "links": 6},
+                {"name": "Enlighten Support", "gem_level": 3},
+            ]
+        )
+    ] == [15, 300]
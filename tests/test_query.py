@@ -0,0 +1,41 @@
+from ninjaclient import Ladder, LadderIndex
+
+from . import fake_builds_response
+
+
+def test_boolean_queries():
+    ladder = Ladder.from_response(fake_builds_response(users=300))
+    idx = LadderIndex(ladder)
+
+    jugg = {u for u, c in enumerate(ladder.classes) if c == 0}
+    unique = set(ladder.unique_items.users_of("Unique 1"))
+    keystone = set(ladder.keystones.users_of("Keystone 2"))
+
+    query = idx.get("class", "Juggernaut") & idx.get("unique", "Unique 1")
+    assert query.user_ids() == sorted(jugg & unique)
+    assert len(query | idx.get("keystone", "Keystone 2")) == len(
+        (jugg & unique) | keystone
+    )
+    assert (~query).user_ids() == sorted(set(range(300)) - (jugg & unique))
+    assert (query - idx.get("keystone", "Keystone 2")).user_ids() == sorted(
+        (jugg & unique) - keystone
+    )
+    assert idx.get("keystone", "Keystone 2").share(query) == len(
+        jugg & unique & keystone
+    ) / len(jugg & unique)
+    assert not idx.get("unique", "Not On The Ladder")
+
+
+def test_co_occurrence():
+    ladder = Ladder.from_response(fake_builds_response(users=300))
+    idx = LadderIndex(ladder)
+
+    table = idx.co_occurrence("class", "keystone")
+    for c, class_name in enumerate(ladder.class_names):
+        users = {u for u, uc in enumerate(ladder.classes) if uc == c}
+        for k, keystone in enumerate(ladder.keystones.labels):
+            assert table[class_name][keystone] == len(
+                users & set(ladder.keystones.users(k))
+            )
+    counts = list(idx.counts("unique").values())
+    assert counts == sorted(counts, reverse=True)
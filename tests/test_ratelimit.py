@@ -0,0 +1,88 @@
+import asyncio
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import web
+from pytest import approx, mark, raises
+
+from apiclient import (
+    RateLimiter,
+    ResponseError,
+    RetryPolicy,
+    SuccessResponse,
+    TokenBucket,
+    parse_retry_after,
+)
+from ninjaclient import EconomyApi, NinjaConfig
+
+from . import serve
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("3") == 3
+    future = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(future, usegmt=True)) == approx(30, abs=2)
+    assert parse_retry_after("soon") is None
+
+
+@mark.asyncio
+async def test_token_bucket_paces():
+    bucket = TokenBucket(rate=50, burst=2)
+    start = time.monotonic()
+    await asyncio.gather(*(bucket.acquire() for _ in range(7)))
+    # 2 tokens are available right away, the other 5 come in at 50/s
+    assert time.monotonic() - start >= 0.09
+
+
+def test_token_bucket_adapts():
+    bucket = TokenBucket(rate=8, min_rate=1)
+    bucket.throttled()
+    bucket.throttled()
+    assert bucket.rate == 2
+    for _ in range(100):
+        bucket.succeeded()
+    assert bucket.rate == 8
+    for _ in range(10):
+        bucket.throttled()
+    assert bucket.rate == 1
+
+
+@mark.asyncio
+async def test_retries_on_429():
+    statuses = [429, 503, 200]
+
+    async def overview(request: web.Request):
+        status = statuses.pop(0)
+        if status != 200:
+            return web.Response(status=status, headers={"Retry-After": "0"})
+        return web.json_response({"lines": [], "language": {"name": "en"}})
+
+    async with serve({"/currencyoverview": overview}) as url:
+        cfg = NinjaConfig(
+            base_url=url,
+            rate_limiter=RateLimiter(rate=100, burst=5),
+            retry=RetryPolicy(base_delay=0.01),
+        )
+        async with EconomyApi(cfg) as api:
+            res = await api.get_currency()
+            stats = api.throttle_stats
+
+    assert isinstance(res, SuccessResponse)
+    assert (stats.attempts, stats.retries, stats.throttled) == (3, 2, 1)
+    assert cfg.rate_limiter.bucket(url.split("//")[1]).rate < 100
+
+
+@mark.asyncio
+async def test_does_not_retry_client_errors():
+    async def overview(request: web.Request):
+        return web.Response(status=404)
+
+    async with serve({"/currencyoverview": overview}) as url:
+        cfg = NinjaConfig(base_url=url, raise_errors=True, retry=RetryPolicy())
+        async with EconomyApi(cfg) as api:
+            with raises(ResponseError) as e:
+                await api.get_currency()
+            assert e.value.status == 404
+            assert api.throttle_stats.attempts == 1
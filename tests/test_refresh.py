@@ -0,0 +1,97 @@
+import asyncio
+
+from aiohttp import web
+from pytest import mark, raises
+
+from ninjaclient import (
+    BuildsApi,
+    EconomyApi,
+    Ladder,
+    NinjaConfig,
+    SnapshotRefresher,
+)
+
+from . import fake_builds_response, serve
+
+
+@mark.asyncio
+async def test_stale_while_revalidate():
+    calls = 0
+    fail = False
+
+    async def overview(request: web.Request):
+        nonlocal calls
+        calls += 1
+        if fail:
+            return web.Response(status=500)
+        return web.json_response(
+            {"lines": [{"detailsId": "golden-oil", "chaosValue": calls}]}
+        )
+
+    async def builds(request: web.Request):
+        return web.json_response(fake_builds_response())
+
+    routes = {"/itemoverview": overview, "/0/getbuildoverview": builds}
+    async with serve(routes) as url:
+        cfg = NinjaConfig(base_url=url, cache_max_entries=8)
+        async with EconomyApi(cfg) as economy, BuildsApi(cfg) as builds:
+            refresher = SnapshotRefresher(jitter=0, stagger=0)
+            refresher.add_category(economy, "Oil", interval=0.05, retry_interval=0.02)
+            refresher.add_ladder(builds, interval=60)
+            assert refresher.get("Oil") is None
+
+            async with refresher:
+                await refresher.wait_ready()
+                assert isinstance(refresher.get("exp"), Ladder)
+                first = refresher.get("Oil")["lines"][0]["chaosValue"]
+
+                # refreshes skip the memory cache
+                await asyncio.sleep(0.12)
+                assert refresher.get("Oil")["lines"][0]["chaosValue"] > first
+
+                # failures keep serving the last good value
+                fail = True
+                await asyncio.sleep(0.08)
+                state = refresher.state("Oil")
+                assert state.error and state.consecutive_failures >= 2
+                last = refresher.get("Oil")
+                assert last is not None
+
+                fail = False
+                state = await refresher.refresh("Oil")
+                assert state.error is None and state.consecutive_failures == 0
+                assert refresher.get("Oil") is not last
+
+            # stopped refreshers stop fetching
+            stopped = calls
+            await asyncio.sleep(0.1)
+            assert calls == stopped
+
+
+@mark.asyncio
+async def test_job_names():
+    async def overview(request: web.Request):
+        league = request.query["league"]
+        return web.json_response({"lines": [{"detailsId": league, "chaosValue": 1}]})
+
+    async with serve({"/itemoverview": overview}) as url:
+        async with EconomyApi(NinjaConfig(base_url=url)) as api:
+            async with EconomyApi(NinjaConfig(base_url=url, league="Hardcore")) as hc:
+                refresher = SnapshotRefresher(jitter=0, stagger=0)
+                refresher.add_category(api, "Oil", interval=60)
+                refresher.add_category(api, "Oil", interval=60, league="Standard")
+                refresher.add_category(hc, "Oil", interval=60, name="Oil:hc")
+                with raises(ValueError):
+                    refresher.add_category(hc, "Oil", interval=60)
+
+                async with refresher:
+                    await refresher.wait_ready()
+                    ids = {
+                        name: refresher.get(name)["lines"][0]["detailsId"]
+                        for name in ("Oil", "Oil:Standard", "Oil:hc")
+                    }
+    assert ids == {
+        "Oil": NinjaConfig().league,
+        "Oil:Standard": "Standard",
+        "Oil:hc": "Hardcore",
+    }
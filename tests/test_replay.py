@@ -0,0 +1,98 @@
+import asyncio
+
+from aiohttp import web
+from pytest import mark
+
+from apiclient import ErrorResponse, ReplayLog, SuccessResponse
+from ninjaclient import BuildsApi, NinjaConfig
+
+from . import fake_builds_response, serve
+
+
+async def character(request: web.Request):
+    return web.json_response(
+        {"account": request.query["account"], "name": request.query["name"]}
+    )
+
+
+async def builds(request: web.Request):
+    return web.json_response(fake_builds_response(users=50))
+
+
+@mark.asyncio
+async def test_record_then_replay(tmp_path):
+    path = tmp_path / "replay.log"
+    routes = {"/0/getcharacter": character, "/0/getbuildoverview": builds}
+    async with serve(routes) as url:
+        log = ReplayLog(path)
+        async with BuildsApi(NinjaConfig(base_url=url, replay=log)) as api:
+            recorded = await asyncio.gather(
+                *(api.get_character(f"account{i}", f"char{i}") for i in range(20))
+            )
+            ladder = await api.get_experience_ladder(stream=True)
+        log.close()
+    assert all(isinstance(res, SuccessResponse) for res in recorded)
+
+    # replays need no server, and the base url is not part of the key
+    log = ReplayLog(path, mode="replay")
+    assert len(log) == 21
+    cfg = NinjaConfig(base_url="http://127.0.0.1:9", replay=log)
+    async with BuildsApi(cfg) as api:
+        replayed = await asyncio.gather(
+            *(api.get_character(f"account{i}", f"char{i}") for i in range(20))
+        )
+        assert replayed == recorded
+        streamed = await api.get_experience_ladder(stream=True)
+        assert streamed.data["levels"].tolist() == ladder.data["levels"].tolist()
+
+        missing = await api.get_character("account", "nobody")
+        assert isinstance(missing, ErrorResponse)
+        assert "No recorded response" in missing.msg
+    log.close()
+
+
+@mark.asyncio
+async def test_torn_record_is_dropped(tmp_path):
+    path = tmp_path / "replay.log"
+    async with serve({"/0/getcharacter": character}) as url:
+        log = ReplayLog(path)
+        async with BuildsApi(NinjaConfig(base_url=url, replay=log)) as api:
+            await api.get_character("account", "first")
+        log.close()
+
+        with path.open("ab") as f:
+            f.write(b"\x10\x00\x00\x00\xff\xff")
+        log = ReplayLog(path)
+        assert len(log) == 1
+        async with BuildsApi(NinjaConfig(base_url=url, replay=log)) as api:
+            await api.get_character("account", "second")
+        log.close()
+
+    log = ReplayLog(path, mode="replay")
+    assert len(log) == 2
+    log.close()
+
+
+@mark.asyncio
+async def test_revalidated_responses_are_recorded(tmp_path):
+    async def etag_character(request: web.Request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.json_response({"name": "char"}, headers={"ETag": '"v1"'})
+
+    path = tmp_path / "replay.log"
+    async with serve({"/0/getcharacter": etag_character}) as url:
+        cfg = NinjaConfig(base_url=url, http_cache_dir=str(tmp_path / "http"))
+        async with BuildsApi(cfg) as api:
+            await api.get_character("account", "char")
+
+        # answered by a 304 and the disk cache
+        cfg.replay = ReplayLog(path, mode="record")
+        async with BuildsApi(cfg) as api:
+            await api.get_character("account", "char")
+        cfg.replay.close()
+
+    log = ReplayLog(path, mode="replay")
+    async with BuildsApi(NinjaConfig(base_url="http://127.0.0.1:9", replay=log)) as api:
+        assert (await api.get_character("account", "char")).data == {"name": "char"}
+    log.close()
@@ -0,0 +1,125 @@
+import math
+from array import array
+
+from pytest import raises
+
+from ninjaclient import EconomySnapshot, Ladder, LadderIndex, SnapshotStore
+
+from . import fake_builds_response
+
+
+def items(*prices: tuple[str, float]) -> dict:
+    return {
+        "lines": [
+            {"detailsId": d, "chaosValue": c, "divineValue": c / 100, "listingCount": 5}
+            for d, c in prices
+        ]
+    }
+
+
+def test_price_history(tmp_path):
+    store = SnapshotStore(tmp_path)
+    store.append_economy("Oil", items(("golden-oil", 10), ("amber-oil", 1)), 100)
+    store.append_economy("Oil", items(("amber-oil", 2)), 200)
+    store.append_economy("Oil", items(("golden-oil", 12), ("clear-oil", 0.5)), 300)
+    store.append_snapshot(
+        EconomySnapshot(
+            currencies={
+                "Currency": {
+                    "lines": [
+                        {
+                            "currencyTypeName": "Divine Orb",
+                            "detailsId": "divine-orb",
+                            "chaosEquivalent": 200,
+                        }
+                    ]
+                }
+            },
+            items={"Oil": items(("golden-oil", 15))},
+        ),
+        400,
+    )
+
+    # a fresh store reads everything back from disk
+    store = SnapshotStore(tmp_path)
+    assert store.snapshot_times("Oil").tolist() == [100, 200, 300, 400]
+    assert store.price_history("Oil", "golden-oil") == [
+        (100, 10),
+        (300, 12),
+        (400, 15),
+    ]
+    assert store.price_history("Oil", "golden-oil", since=150, until=350) == [(300, 12)]
+    assert store.price_history("Oil", "amber-oil", column="divine") == [
+        (100, 0.01),
+        (200, 0.02),
+    ]
+    assert store.price_history("Oil", "unknown-oil") == []
+    [(t, divine)] = store.price_history("Currency", "divine-orb", column="divine")
+    assert t == 400 and math.isnan(divine)
+
+
+def test_interrupted_append_is_ignored(tmp_path):
+    store = SnapshotStore(tmp_path)
+    store.append_economy("Oil", items(("golden-oil", 10)), 100)
+    # rows written without the snapshot being committed
+    with (tmp_path / "economy" / "Oil" / "rows.i32").open("ab") as f:
+        f.write(b"\x07\x00\x00\x00\x01")
+    store.append_economy("Oil", items(("golden-oil", 11)), 200)
+    assert store.price_history("Oil", "golden-oil") == [(100, 10), (200, 11)]
+
+
+def test_ladder_round_trip(tmp_path):
+    ladder = Ladder.from_response(fake_builds_response())
+    store = SnapshotStore(tmp_path)
+    store.append_ladder("exp", ladder, 100.5)
+    assert store.ladder_times("exp") == [100.5]
+
+    loaded = store.load_ladder("exp", 100.5)
+    assert loaded.levels.tolist() == ladder.levels.tolist()
+    assert loaded.keystones.users_of("Keystone 1").tolist() == (
+        ladder.keystones.users_of("Keystone 1").tolist()
+    )
+    assert LadderIndex(loaded).counts("class") == LadderIndex(ladder).counts("class")
+
+
+def test_crash_before_commit_is_dropped(tmp_path):
+    store = SnapshotStore(tmp_path)
+    store.append_economy("Oil", items(("a", 10)), 100)
+    # a snapshot whose end was written but not its time
+    directory = tmp_path / "economy" / "Oil"
+    with (directory / "rows.i32").open("ab") as f:
+        array("i", [0]).tofile(f)
+    with (directory / "chaos.f64").open("ab") as f:
+        array("d", [99]).tofile(f)
+    with (directory / "ends.i64").open("ab") as f:
+        array("q", [2]).tofile(f)
+
+    store = SnapshotStore(tmp_path)
+    store.append_economy("Oil", items(("a", 11)), 200)
+    assert store.price_history("Oil", "a") == [(100, 10), (200, 11)]
+    assert (directory / "ends.i64").stat().st_size == 2 * 8
+
+
+def test_recovery_keeps_mapped_columns(tmp_path):
+    store = SnapshotStore(tmp_path)
+    store.append_economy("Oil", items(("a", 10), ("b", 1)), 100)
+    rows = tmp_path / "economy" / "Oil" / "rows.i32"
+    # an interrupted append left more rows than the next one writes
+    with rows.open("ab") as f:
+        array("i", [0, 1, 2]).tofile(f)
+    size = rows.stat().st_size
+
+    # a reader may still map the whole file, so it is written over, not cut
+    store.append_economy("Oil", items(("a", 11)), 200)
+    assert rows.stat().st_size == size
+    assert store.price_history("Oil", "b") == [(100, 1)]
+    assert store.price_history("Oil", "a") == [(100, 10), (200, 11)]
+
+
+def test_rejects_older_snapshots(tmp_path):
+    store = SnapshotStore(tmp_path)
+    store.append_economy("Oil", items(("a", 10)), 200)
+    store.append_economy("Oil", items(("a", 11)), 200)
+    with raises(ValueError):
+        store.append_economy("Oil", items(("a", 12)), 100)
+    assert store.snapshot_times("Oil").tolist() == [200, 200]
@@ -0,0 +1,82 @@
+import json
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+from pytest import mark, raises
+
+from apiclient import JsonObjectStreamParser, SuccessResponse
+from ninjaclient import BuildsApi, NinjaConfig
+from ninjaclient.streaming import BuildsStreamParser
+
+from . import fake_builds_response, serve
+
+
+def as_lists(o):
+    if isinstance(o, array):
+        return o.tolist()
+    if isinstance(o, dict):
+        return {k: as_lists(v) for k, v in o.items()}
+    if isinstance(o, list):
+        return [as_lists(v) for v in o]
+    return o
+
+
+def parse_in_chunks(parser, body: bytes, size: int):
+    for i in range(0, len(body), size):
+        parser.feed(body[i : i + size])
+    return parser.close()
+
+
+@mark.parametrize("chunk_size", [1, 7, 4096])
+def test_builds_stream_parser(chunk_size):
+    ladder = fake_builds_response()
+    body = json.dumps(ladder, indent=1).encode()
+    parsed = parse_in_chunks(BuildsStreamParser(), body, chunk_size)
+    assert isinstance(parsed["levels"], array)
+    assert all(isinstance(v, array) for v in parsed["uniqueItemUse"].values())
+    for detail in parsed["skillDetails"]:
+        assert all(isinstance(v, array) for v in detail["supportGems"]["use"].values())
+    assert as_lists(parsed) == ladder
+
+
+def test_generic_values():
+    doc = {"a": "é", "b": [], "c": {}, "d": [{"x": [1.5, -2e3]}], "e": None, "f": 12}
+    assert parse_in_chunks(JsonObjectStreamParser(), json.dumps(doc).encode(), 1) == doc
+
+
+def test_truncated_body():
+    with raises(ValueError):
+        parse_in_chunks(BuildsStreamParser(), b'{"levels": [1, 2', 3)
+
+
+@mark.asyncio
+@mark.parametrize("offload", [False, True])
+async def test_get_experience_ladder_stream(offload, monkeypatch):
+    ladder = fake_builds_response(users=2000)
+    feed_threads = set()
+    feed = BuildsStreamParser.feed
+
+    def recording_feed(self, chunk):
+        feed_threads.add(threading.get_ident())
+        feed(self, chunk)
+
+    monkeypatch.setattr(BuildsStreamParser, "feed", recording_feed)
+
+    async def overview(request: web.Request):
+        return web.json_response(ladder)
+
+    async with serve({"/0/getbuildoverview": overview}) as url:
+        with ThreadPoolExecutor(1) as executor:
+            cfg = NinjaConfig(
+                base_url=url, decode_executor=executor if offload else None
+            )
+            async with BuildsApi(cfg) as api:
+                res = await api.get_experience_ladder(stream=True)
+
+    assert isinstance(res, SuccessResponse)
+    assert isinstance(res.data["life"], array)
+    assert as_lists(res.data) == ladder
+    # the parser only runs on the loop without a decode executor
+    assert (threading.get_ident() in feed_threads) != offload
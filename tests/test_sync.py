@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from apiclient import EventLoopThread, SuccessResponse, SyncClient
+from ninjaclient import BuildsApi, NinjaConfig
+
+from . import serve
+
+
+async def character(request: web.Request):
+    return web.json_response(
+        {"account": request.query["account"], "name": request.query["name"]}
+    )
+
+
+def test_sync_client():
+    loop = EventLoopThread()
+    server = serve({"/0/getcharacter": character})
+    url = loop.run(server.__aenter__())
+    try:
+        with SyncClient(lambda: BuildsApi(NinjaConfig(base_url=url)), loop) as api:
+            res = api.get_character("account", "char")
+            assert res == SuccessResponse({"account": "account", "name": "char"})
+            session = api.session
+
+            # many caller threads share the one session
+            with ThreadPoolExecutor(8) as pool:
+                results = list(
+                    pool.map(lambda i: api.get_character("a", f"c{i}"), range(32))
+                )
+            assert [r.data["name"] for r in results] == [f"c{i}" for i in range(32)]
+            assert api.session is session
+
+            mapped = api.map(
+                lambda client, i: client.get_character("a", f"c{i}"),
+                range(10),
+                concurrency=3,
+            )
+            assert [r.data["name"] for r in mapped] == [f"c{i}" for i in range(10)]
+            first, second = api.gather(
+                lambda client: client.get_character("a", "first"),
+                lambda client: client.get_character("a", "second"),
+            )
+            assert (first.data["name"], second.data["name"]) == ("first", "second")
+
+            crawled = api.crawl_characters([("a", "x"), ("a", "y")])
+            assert sorted(c["name"] for c in crawled) == ["x", "y"]
+        assert session.closed
+    finally:
+        loop.run(server.__aexit__(None, None, None))
+        loop.close()
+
+
+def test_attributes_resolve_on_the_loop():
+    loop = EventLoopThread()
+    try:
+        with SyncClient(lambda: BuildsApi(NinjaConfig()), loop) as api:
+            # the session is created lazily and needs the running loop
+            session = api.session
+            assert not session.closed
+        assert session.closed
+    finally:
+        loop.close()